@@ -3,18 +3,20 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from starlette.websockets import WebSocketDisconnect
 from jose import JWTError, jwt
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db, get_db
+from app.database.routing import pin_user
 from app.database.models import User
 from app.core.security import JWTService
 from app.kafka.registry import get_kafka_producer_instance
+from app.repositories.user_repository import AsyncUserRepository
 
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
     """
     Extract current authenticated user from JWT.
@@ -39,10 +41,8 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(
-        User.id == int(user_id),
-        User.is_deleted.is_(False)
-    ).first()
+    pin_user(db, int(user_id))
+    user = await AsyncUserRepository(db).get_by_id(int(user_id))
 
     if not user:
         raise credentials_exception
@@ -72,7 +72,7 @@ def get_kafka_producer():
 
 async def get_current_admin_from_ws(
     websocket: WebSocket,
-    db: Session,
+    db: AsyncSession,
 ) -> User:
     """
     Authenticate admin user from WebSocket connection.
@@ -97,17 +97,9 @@ async def get_current_admin_from_ws(
         await websocket.close(code=1008)
         raise WebSocketDisconnect()
 
-    user = (
-        db.query(User)
-        .filter(
-            User.id == int(user_id),
-            User.is_deleted.is_(False),
-            User.is_admin.is_(True),
-        )
-        .first()
-    )
+    user = await AsyncUserRepository(db).get_by_id(int(user_id))
 
-    if not user:
+    if not user or not user.is_admin:
         await websocket.close(code=1008)
         raise WebSocketDisconnect()
 
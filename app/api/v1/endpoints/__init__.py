@@ -1,4 +1,6 @@
 from .auth import router as auth_router
 from .users import router as users_router
 from .admin import router as admin_router
-from .tasks import router as tasks_router
\ No newline at end of file
+from .tasks import router as tasks_router
+from .activity import router as activity_router
+from .metrics import router as metrics_router
@@ -0,0 +1,64 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_async_db, get_db, get_current_admin_user
+from app.database.models import User
+from app.database.models.activity import ActivityType
+from app.schemas.activity import ActivityPageResponse, ActivityStatsResponse
+from app.services.activity_rollup_service import ActivityRollupService
+from app.services.activity_service import ActivityService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ActivityPageResponse)
+async def list_activity(
+    user_id: int | None = None,
+    task_id: int | None = None,
+    activity_type: ActivityType | None = None,
+    request_id: str | None = None,
+    start: datetime | None = Query(default=None, description="Inclusive lower bound on created_at"),
+    end: datetime | None = Query(default=None, description="Exclusive upper bound on created_at"),
+    cursor: str | None = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    admin: User = Depends(get_current_admin_user),
+):
+    return await ActivityService.list_activity(
+        db,
+        user_id=user_id,
+        task_id=task_id,
+        activity_type=activity_type,
+        request_id=request_id,
+        start=start,
+        end=end,
+        cursor=cursor,
+        limit=limit,
+    )
+
+
+@router.get("/stats", response_model=ActivityStatsResponse)
+def activity_stats(
+    granularity: str = Query(default="hour", description="minute, hour or day"),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    activity_type: ActivityType | None = None,
+    user_id: int | None = None,
+    group_by: str = Query(default="type", description="type or user"),
+    db: Session = Depends(get_db),
+    admin: User = Depends(get_current_admin_user),
+):
+    """
+    Activity counts per time bucket, served from the rollup tables.
+    """
+    return ActivityRollupService.get_series(
+        db,
+        granularity=granularity,
+        start=start,
+        end=end,
+        activity_type=activity_type,
+        user_id=user_id,
+        group_by=group_by,
+    )
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_admin_user
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database.models import User
+from app.database import replica_router
+from app.database.pool import get_pool_monitor_instance
+from app.kafka.registry import get_kafka_consumer_instance
+
+router = APIRouter()
+
+
+@router.get("", response_class=PlainTextResponse)
+def scrape_metrics():
+    """
+    Prometheus scrape endpoint for every metric registered in this process.
+    """
+    if not settings.metrics_scrape_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(
+        metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/consumer")
+def consumer_metrics(
+    admin: User = Depends(get_current_admin_user),
+):
+    """
+    Admin consumer lag per partition, throughput, batch time and WebSocket
+    send / end-to-end latency.
+    """
+    try:
+        consumer = get_kafka_consumer_instance()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return consumer.stats()
+
+
+@router.get("/db")
+def db_pool_metrics(
+    admin: User = Depends(get_current_admin_user),
+):
+    """
+    Admin view of the DB pools: size, checkouts, wait times and every
+    connection currently checked out, with its age and call site. Also
+    replica health and how statements were routed.
+    """
+    try:
+        monitor = get_pool_monitor_instance()
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return {**monitor.stats(), "replicas": replica_router.stats()}
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
 from app.services.task_service import TaskService
-from app.api.deps import get_db, get_current_user, get_kafka_producer
+from app.api.deps import get_async_db, get_current_user
 from app.core.config import settings
 from app.database.models import User
 
@@ -14,9 +14,8 @@ async def create_task(
     payload: TaskCreate,
     background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
-    kafka_producer=Depends(get_kafka_producer),
 ):
     request_id = request.state.request_id
 
@@ -27,7 +26,6 @@ async def create_task(
         payload=payload,
         background_tasks=background_tasks,
         request_id=request_id,
-        kafka_producer=kafka_producer,
         kafka_topic=settings.kafka_activity_topic,
         meta={
             "ip_address": request.client.host,
@@ -43,9 +41,8 @@ async def update_task(
     payload: TaskUpdate,
     background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
-    kafka_producer=Depends(get_kafka_producer),
 ):
     request_id = request.state.request_id
 
@@ -57,7 +54,6 @@ async def update_task(
         payload=payload,
         background_tasks=background_tasks,
         request_id=request_id,
-        kafka_producer=kafka_producer,
         kafka_topic=settings.kafka_activity_topic,
         meta={
             "ip_address": request.client.host,
@@ -72,9 +68,8 @@ async def delete_task(
     task_id: int,
     background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
-    kafka_producer=Depends(get_kafka_producer),
 ):
     request_id = request.state.request_id
 
@@ -85,7 +80,6 @@ async def delete_task(
         current_user=current_user,
         background_tasks=background_tasks,
         request_id=request_id,
-        kafka_producer=kafka_producer,
         kafka_topic=settings.kafka_activity_topic,
         meta={
             "ip_address": request.client.host,
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.api.deps import get_db, get_current_user, get_kafka_producer
+from app.api.deps import get_async_db, get_current_user
 from app.schemas.user import UserProfileUpdate, UserResponse
 from app.services.user_service import UserService
 from app.database.models import User
@@ -15,9 +15,8 @@ async def update_profile(
     payload: UserProfileUpdate,
     background_tasks: BackgroundTasks,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
-    kafka_producer = Depends(get_kafka_producer),
 ):
     request_id = request.state.request_id
 
@@ -28,7 +27,6 @@ async def update_profile(
         payload=payload,
         background_tasks=background_tasks,
         request_id=request_id,
-        kafka_producer=kafka_producer,
         kafka_topic=settings.kafka_activity_topic,
         meta={
             "ip_address": request.client.host,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth_router, users_router, tasks_router
+from app.api.v1.endpoints import auth_router, users_router, tasks_router, activity_router, metrics_router
 
 
 api_router = APIRouter()
@@ -8,5 +8,7 @@ api_router = APIRouter()
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
 api_router.include_router(users_router, prefix="/users", tags=["users"])
 api_router.include_router(tasks_router, prefix="/tasks", tags=["tasks"])
+api_router.include_router(activity_router, prefix="/activity", tags=["activity"])
+api_router.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
 
 
@@ -0,0 +1,154 @@
+import json
+from abc import ABC, abstractmethod
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: binary codec unavailable
+    msgpack = None
+
+
+# Kafka header carrying the codec name of the message value
+CODEC_HEADER = "codec"
+
+# WebSocket subprotocol prefix, e.g. "activity.v1.msgpack"
+SUBPROTOCOL_PREFIX = "activity.v1."
+
+
+class EventCodec(ABC):
+    """
+    Encodes event dicts for Kafka and WebSocket frames.
+
+    ``binary`` codecs are sent as binary WebSocket frames, the others as
+    text frames. Subclasses set ``name`` and implement every abstract
+    method; an incomplete codec fails when it is instantiated.
+    """
+
+    binary: bool = False
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """
+        Codec name, used in the Kafka header and the WebSocket subprotocol.
+        """
+
+    @abstractmethod
+    def encode(self, value) -> bytes:
+        ...
+
+    @abstractmethod
+    def decode(self, data: bytes | str):
+        ...
+
+    @abstractmethod
+    def envelope(self, topic: str, raw_event: bytes, seq: int | None = None) -> bytes:
+        """
+        ``{"seq": seq, "topic": topic, "event": <raw_event>}`` built around
+        an event that is already encoded with this codec, without decoding
+        it. ``seq`` is left out when None.
+        """
+
+    @abstractmethod
+    def array(self, items: list[bytes]) -> bytes:
+        """
+        An array of values that are already encoded with this codec, built
+        without decoding them.
+        """
+
+    @property
+    def subprotocol(self) -> str:
+        return f"{SUBPROTOCOL_PREFIX}{self.name}"
+
+
+class JsonCodec(EventCodec):
+    name = "json"
+
+    def encode(self, value) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, data: bytes | str):
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    def envelope(self, topic: str, raw_event: bytes, seq: int | None = None) -> bytes:
+        head = b"{" if seq is None else b'{"seq":%d,' % seq
+        return head + b'"topic":' + self.encode(topic) + b',"event":' + raw_event + b"}"
+
+    def array(self, items: list[bytes]) -> bytes:
+        return b"[" + b",".join(items) + b"]"
+
+
+class MsgpackCodec(EventCodec):
+    name = "msgpack"
+    binary = True
+
+    def encode(self, value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data: bytes | str):
+        return msgpack.unpackb(data, raw=False)
+
+    def envelope(self, topic: str, raw_event: bytes, seq: int | None = None) -> bytes:
+        # fixmap with 2 or 3 entries, then key/value pairs
+        head = b"\x82" if seq is None else b"\x83" + self.encode("seq") + self.encode(seq)
+        return head + self.encode("topic") + self.encode(topic) + self.encode("event") + raw_event
+
+    def array(self, items: list[bytes]) -> bytes:
+        count = len(items)
+        if count < 16:
+            header = bytes([0x90 | count])  # fixarray
+        elif count < 0x10000:
+            header = b"\xdc" + count.to_bytes(2, "big")  # array 16
+        else:
+            header = b"\xdd" + count.to_bytes(4, "big")  # array 32
+        return header + b"".join(items)
+
+
+_CODECS: dict[str, EventCodec] = {"json": JsonCodec()}
+if msgpack is not None:
+    _CODECS["msgpack"] = MsgpackCodec()
+
+
+def available_codecs() -> list[str]:
+    return list(_CODECS)
+
+
+def get_codec(name: str) -> EventCodec:
+    try:
+        return _CODECS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported codec: {name} (available: {', '.join(_CODECS)})"
+        ) from None
+
+
+def codec_from_headers(headers, default: EventCodec) -> EventCodec:
+    """
+    Codec named by a Kafka message's ``codec`` header; messages without the
+    header (produced before it existed) use ``default``.
+    """
+    for key, value in headers or ():
+        if key == CODEC_HEADER:
+            return get_codec(value.decode("utf-8"))
+    return default
+
+
+def negotiate_subprotocol(offered: list[str]) -> EventCodec | None:
+    """
+    First codec the client offered as a WebSocket subprotocol that we
+    support, in the client's preference order. None if nothing matches.
+    """
+    for protocol in offered:
+        if protocol.startswith(SUBPROTOCOL_PREFIX):
+            codec = _CODECS.get(protocol[len(SUBPROTOCOL_PREFIX):])
+            if codec is not None:
+                return codec
+    return None
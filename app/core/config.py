@@ -14,6 +14,69 @@ class Settings(BaseSettings):
     # Database Settings
     database_url: str = Field(default="sqlite:///./test.db", alias="DATABASE_URL")
     database_echo: bool = Field(default=False, alias="DATABASE_ECHO")
+    # Used by async endpoints; derived from DATABASE_URL (asyncpg /
+    # aiosqlite) when unset
+    async_database_url: str | None = Field(default=None, alias="ASYNC_DATABASE_URL")
+
+    # Database Pool Settings (per engine: the sync and async engines each
+    # keep their own pool)
+    database_pool_size: int = Field(default=10, alias="DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(default=10, alias="DATABASE_MAX_OVERFLOW")
+    # Seconds a checkout waits for a free connection before failing
+    database_pool_timeout: float = Field(default=30, alias="DATABASE_POOL_TIMEOUT")
+    # Seconds after which a connection is replaced (-1 = never)
+    database_pool_recycle: int = Field(default=1800, alias="DATABASE_POOL_RECYCLE")
+    database_pool_pre_ping: bool = Field(default=True, alias="DATABASE_POOL_PRE_PING")
+    # Connections checked out longer than this are reported with the call
+    # site that acquired them
+    database_connection_hold_warn_ms: int = Field(default=5000, alias="DATABASE_CONNECTION_HOLD_WARN_MS")
+    database_pool_monitor_interval_seconds: float = Field(default=5, alias="DATABASE_POOL_MONITOR_INTERVAL_SECONDS")
+
+    # Database Read Replica Settings
+    # Comma-separated replica URLs (same format as DATABASE_URL); request
+    # sessions send plain SELECTs to them round-robin. Empty = primary only
+    database_replica_urls: str = Field(default="", alias="DATABASE_REPLICA_URLS")
+    database_replica_health_check_interval_seconds: float = Field(default=5, alias="DATABASE_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS")
+    # Replicas replaying further behind than this leave the rotation (0 = no limit)
+    database_replica_max_lag_seconds: float = Field(default=10, alias="DATABASE_REPLICA_MAX_LAG_SECONDS")
+    # A user's reads stay on the primary this long after they write; must be
+    # at least max lag + health check interval
+    database_read_your_writes_seconds: float = Field(default=15, alias="DATABASE_READ_YOUR_WRITES_SECONDS")
+
+    # Activity Log Partitioning / Retention Settings
+    # Range partitions on activity_logs.created_at (PostgreSQL only)
+    activity_partitioning_enabled: bool = Field(default=True, alias="ACTIVITY_PARTITIONING_ENABLED")
+    # "day" or "month"
+    activity_partition_interval: str = Field(default="month", alias="ACTIVITY_PARTITION_INTERVAL")
+    # Number of future partitions kept ready ahead of time
+    activity_partition_premake: int = Field(default=3, alias="ACTIVITY_PARTITION_PREMAKE")
+    # 0 (default) keeps activity logs forever
+    activity_retention_days: int = Field(default=0, alias="ACTIVITY_RETENTION_DAYS")
+    # "detach" (default) keeps expired partitions as standalone tables,
+    # "drop" deletes them for good
+    activity_retention_action: str = Field(default="detach", alias="ACTIVITY_RETENTION_ACTION")
+    # Without partitions (e.g. SQLite in dev) retention is a bulk DELETE and
+    # only runs when enabled here
+    activity_retention_delete_enabled: bool = Field(default=False, alias="ACTIVITY_RETENTION_DELETE_ENABLED")
+    activity_maintenance_interval_seconds: int = Field(default=3600, alias="ACTIVITY_MAINTENANCE_INTERVAL_SECONDS")
+
+    # Activity Rollup Settings
+    # "incremental": updated in the same transaction as each activity insert
+    # "catchup": background job aggregates rows past a watermark
+    # "off": rollups are not maintained
+    activity_rollup_mode: str = Field(default="incremental", alias="ACTIVITY_ROLLUP_MODE")
+    activity_rollup_batch_size: int = Field(default=5000, alias="ACTIVITY_ROLLUP_BATCH_SIZE")
+    activity_rollup_interval_seconds: int = Field(default=10, alias="ACTIVITY_ROLLUP_INTERVAL_SECONDS")
+    # Rows newer than this are left for the next run, so rows committed late
+    # with lower ids are not skipped; must outlast the longest insert transaction
+    activity_rollup_lag_seconds: int = Field(default=30, alias="ACTIVITY_ROLLUP_LAG_SECONDS")
+
+    # Activity Archive Settings (cold rows -> compressed segment files)
+    activity_archive_enabled: bool = Field(default=False, alias="ACTIVITY_ARCHIVE_ENABLED")
+    activity_archive_dir: str = Field(default="./archive/activity", alias="ACTIVITY_ARCHIVE_DIR")
+    activity_archive_after_days: int = Field(default=30, alias="ACTIVITY_ARCHIVE_AFTER_DAYS")
+    activity_archive_segment_rows: int = Field(default=50000, alias="ACTIVITY_ARCHIVE_SEGMENT_ROWS")
+    activity_archive_interval_seconds: int = Field(default=3600, alias="ACTIVITY_ARCHIVE_INTERVAL_SECONDS")
 
     # Admin User Settings
     admin_email: str = Field(default="admin_user@example.com", alias="ADMIN_EMAIL")
@@ -30,6 +93,79 @@ class Settings(BaseSettings):
     kafka_activity_topic: str = Field(default="user.activity", alias="KAFKA_ACTIVITY_TOPIC")
     kafka_client_id: str = Field(default="fastapi-activity-poc", alias="KAFKA_CLIENT_ID")
     kafka_group_id: str = Field(default="admin-monitor-group", alias="KAFKA_GROUP_ID")
+    # Admin consumer: getmany batches, one offset commit per batch
+    kafka_consumer_batch_mode: bool = Field(default=True, alias="KAFKA_CONSUMER_BATCH_MODE")
+    kafka_consumer_max_records: int = Field(default=500, alias="KAFKA_CONSUMER_MAX_RECORDS")
+    kafka_consumer_timeout_ms: int = Field(default=500, alias="KAFKA_CONSUMER_TIMEOUT_MS")
+    # Total lag (messages, all partitions) above which the consumer reports
+    # lagging=true and kafka_consumer_lag_alert=1
+    kafka_consumer_lag_alert_threshold: int = Field(default=10000, alias="KAFKA_CONSUMER_LAG_ALERT_THRESHOLD")
+
+    # Metrics Settings
+    # Unauthenticated Prometheus scrape endpoint at /api/v1/metrics
+    metrics_scrape_enabled: bool = Field(default=True, alias="METRICS_SCRAPE_ENABLED")
+
+    # Admin Activity Stream Settings
+    # "local": every worker consumes Kafka itself (single worker)
+    # "hub": one consumer per host (per-host group id), fanned out to the
+    # other uvicorn workers over a Unix socket
+    admin_stream_mode: str = Field(default="local", alias="ADMIN_STREAM_MODE")
+    admin_stream_socket_path: str = Field(default="/tmp/activity-stream.sock", alias="ADMIN_STREAM_SOCKET_PATH")
+    admin_stream_lock_path: str = Field(default="/tmp/activity-stream.lock", alias="ADMIN_STREAM_LOCK_PATH")
+    # Followers whose unsent backlog exceeds this are disconnected
+    admin_stream_max_buffer_bytes: int = Field(default=8 * 1024 * 1024, alias="ADMIN_STREAM_MAX_BUFFER_BYTES")
+    # Per admin socket: frames queued for its writer, and the deadline for
+    # one send; sockets exceeding either are disconnected. Keep the queue
+    # larger than KAFKA_CONSUMER_MAX_RECORDS (one batch is enqueued at once)
+    admin_ws_send_queue_size: int = Field(default=1000, alias="ADMIN_WS_SEND_QUEUE_SIZE")
+    admin_ws_send_timeout_ms: int = Field(default=5000, alias="ADMIN_WS_SEND_TIMEOUT_MS")
+    # Coalesce what is queued within this window into one array frame
+    # (0 = one frame per message; clients must accept arrays when enabled)
+    admin_ws_coalesce_ms: int = Field(default=0, alias="ADMIN_WS_COALESCE_MS")
+    admin_ws_coalesce_max_events: int = Field(default=100, alias="ADMIN_WS_COALESCE_MAX_EVENTS")
+    # Per-socket cap; the excess is replaced by one summary message per
+    # second (0 = unlimited)
+    admin_ws_max_events_per_second: int = Field(default=0, alias="ADMIN_WS_MAX_EVENTS_PER_SECOND")
+    # Recent events kept in memory for ?last_seq= resume after a reconnect
+    admin_ws_resume_buffer_size: int = Field(default=10000, alias="ADMIN_WS_RESUME_BUFFER_SIZE")
+    # History replay (?since=<timestamp> on the admin socket): events/sec
+    # per replaying socket, and live events held back while it runs
+    admin_replay_rate: int = Field(default=2000, alias="ADMIN_REPLAY_RATE")
+    admin_replay_max_buffered: int = Field(default=10000, alias="ADMIN_REPLAY_MAX_BUFFERED")
+
+    # Kafka Producer Settings
+    kafka_producer_linger_ms: int = Field(default=20, alias="KAFKA_PRODUCER_LINGER_MS")
+    # Max bytes per partition batch
+    kafka_producer_max_batch_size: int = Field(default=65536, alias="KAFKA_PRODUCER_MAX_BATCH_SIZE")
+    # "zstd", "lz4", "snappy", "gzip" or "none"
+    kafka_producer_compression_type: str = Field(default="zstd", alias="KAFKA_PRODUCER_COMPRESSION_TYPE")
+    kafka_producer_acks: str = Field(default="all", alias="KAFKA_PRODUCER_ACKS")
+    # Value encoding: "json" (orjson) or "msgpack"; consumers follow the codec header
+    kafka_codec: str = Field(default="json", alias="KAFKA_CODEC")
+    # Message key: "actor", "resource", "root_task" (task tree) or "none"
+    kafka_partition_key_strategy: str = Field(default="root_task", alias="KAFKA_PARTITION_KEY_STRATEGY")
+    kafka_hot_key_window_seconds: int = Field(default=60, alias="KAFKA_HOT_KEY_WINDOW_SECONDS")
+    # Warn when one key carries at least this share of a window's messages
+    kafka_hot_key_share_threshold: float = Field(default=0.2, alias="KAFKA_HOT_KEY_SHARE_THRESHOLD")
+
+    # Activity Writer Settings
+    activity_writer_batch_size: int = Field(default=500, alias="ACTIVITY_WRITER_BATCH_SIZE")
+    activity_writer_linger_ms: int = Field(default=200, alias="ACTIVITY_WRITER_LINGER_MS")
+    activity_writer_queue_size: int = Field(default=10000, alias="ACTIVITY_WRITER_QUEUE_SIZE")
+
+    # Outbox Relay Settings
+    outbox_relay_batch_size: int = Field(default=500, alias="OUTBOX_RELAY_BATCH_SIZE")
+    outbox_relay_poll_interval_ms: int = Field(default=500, alias="OUTBOX_RELAY_POLL_INTERVAL_MS")
+    outbox_retention_hours: int = Field(default=24, alias="OUTBOX_RETENTION_HOURS")
+
+    # Activity Sink Settings (Kafka -> activity_logs)
+    # When enabled, API workers stop writing activity_logs and the sink does it.
+    activity_sink_enabled: bool = Field(default=False, alias="ACTIVITY_SINK_ENABLED")
+    # Run the sink inside the API process (dev); otherwise `python -m app.kafka.activity_sink`
+    activity_sink_embedded: bool = Field(default=False, alias="ACTIVITY_SINK_EMBEDDED")
+    activity_sink_group_id: str = Field(default="activity-sink-group", alias="ACTIVITY_SINK_GROUP_ID")
+    activity_sink_max_records: int = Field(default=1000, alias="ACTIVITY_SINK_MAX_RECORDS")
+    activity_sink_timeout_ms: int = Field(default=1000, alias="ACTIVITY_SINK_TIMEOUT_MS")
 
     class Config:
         env_file = ".env"
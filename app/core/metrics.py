@@ -0,0 +1,200 @@
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    """
+    Monotonically increasing value.
+    """
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """
+    Value that can go up and down.
+    """
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Histogram:
+    """
+    Cumulative bucketed observations (count, sum, buckets, max).
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.buckets, self._counts):
+                running += count
+                cumulative.append((bound, running))
+            return {
+                "count": self._count,
+                "sum": self._sum,
+                "max": self._max,
+                "avg": self._sum / self._count if self._count else 0.0,
+                "buckets": cumulative,
+            }
+
+
+class MetricsRegistry:
+    """
+    Process-local registry of named metrics.
+
+    Metrics are identified by name plus an optional set of labels, so
+    ``counter("x", topic="a")`` and ``counter("x", topic="b")`` are two series.
+    """
+
+    def __init__(self):
+        self._metrics: dict[tuple, object] = {}
+        self._help: dict[str, str] = {}
+        self._types: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, kind, name: str, help: str, labels: dict, **kwargs):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = kind(**kwargs)
+                    self._metrics[key] = metric
+                    self._types.setdefault(name, kind.__name__.lower())
+                    if help:
+                        self._help.setdefault(name, help)
+        return metric
+
+    def counter(self, name: str, help: str = "", **labels) -> Counter:
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = "", **labels) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help: str = "",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        **labels,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+    def snapshot(self) -> dict:
+        """
+        JSON-friendly view of every registered series.
+        """
+        result: dict[str, list] = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            value = metric.snapshot() if isinstance(metric, Histogram) else metric.value
+            result.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return result
+
+    def render_prometheus(self) -> str:
+        """
+        Every registered series in the Prometheus text exposition format
+        (version 0.0.4).
+        """
+        series: dict[str, list] = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            series.setdefault(name, []).append((labels, metric))
+
+        lines = []
+        for name in sorted(series):
+            if name in self._help:
+                lines.append(f"# HELP {name} {_escape_help(self._help[name])}")
+            lines.append(f"# TYPE {name} {self._types[name]}")
+            for labels, metric in series[name]:
+                if isinstance(metric, Histogram):
+                    lines.extend(_histogram_lines(name, labels, metric.snapshot()))
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(metric.value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(value)
+
+
+def _histogram_lines(name: str, labels: tuple, snapshot: dict) -> list[str]:
+    lines = []
+    for bound, count in snapshot["buckets"]:
+        bucket_labels = labels + (("le", _format_value(bound)),)
+        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+    inf_labels = labels + (("le", "+Inf"),)
+    lines.append(f"{name}_bucket{_format_labels(inf_labels)} {snapshot['count']}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+metrics = MetricsRegistry()
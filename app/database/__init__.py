@@ -1,2 +1,4 @@
 from .database import Base, engine
-from .database import SessionLocal
\ No newline at end of file
+from .database import SessionLocal
+from .database import AsyncSessionLocal, async_engine
+from .database import AsyncRoutedSessionLocal, replica_router
@@ -1,31 +1,164 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
+from fastapi import Request
 from sqlalchemy import MetaData, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from app.core.config import settings
+from app.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+from app.database.routing import Replica, ReplicaRouter, RoutingSession, pin_primary
 
 
 DATABASE_URL = settings.database_url
 
+# Async drivers used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    ``url`` with its driver swapped for the backend's asyncio driver, e.g.
+    postgresql+psycopg2:// -> postgresql+asyncpg://.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = settings.async_database_url or async_database_url(DATABASE_URL)
+
+
+def pool_options(url: str, poolclass) -> dict:
+    """
+    Pool arguments from settings. In-memory SQLite keeps SQLAlchemy's
+    single-connection pool: every new connection would be an empty database.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
 engine = create_engine(
     DATABASE_URL,
     echo=settings.database_echo,
+    pool_logging_name="primary",
+    **pool_options(DATABASE_URL, InstrumentedQueuePool),
 )
+instrument_engine(engine, "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Used by async endpoints so DB round trips do not block the event loop.
+# Objects stay loaded after commit: lazy refreshes cannot run outside
+# an await.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=settings.database_echo,
+    pool_logging_name="primary_async",
+    **pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool),
+)
+instrument_engine(async_engine.sync_engine, "primary_async")
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def create_replica(index: int, url: str) -> Replica:
+    name = f"replica{index}"
+    replica_engine = create_engine(
+        url,
+        echo=settings.database_echo,
+        pool_logging_name=name,
+        **pool_options(url, InstrumentedQueuePool),
+    )
+    instrument_engine(replica_engine, name)
+
+    async_url = async_database_url(url)
+    replica_async_engine = create_async_engine(
+        async_url,
+        echo=settings.database_echo,
+        pool_logging_name=f"{name}_async",
+        **pool_options(async_url, InstrumentedAsyncQueuePool),
+    )
+    instrument_engine(replica_async_engine.sync_engine, f"{name}_async")
+    return Replica(name, replica_engine, replica_async_engine)
+
+
+replica_router = ReplicaRouter(
+    [
+        create_replica(index, url.strip())
+        for index, url in enumerate(
+            url for url in settings.database_replica_urls.split(",") if url.strip()
+        )
+    ],
+    health_check_interval_seconds=settings.database_replica_health_check_interval_seconds,
+    max_lag_seconds=settings.database_replica_max_lag_seconds,
+    read_your_writes_seconds=settings.database_read_your_writes_seconds,
+)
+
+# Request-scoped sessions: reads of safe (GET) requests may go to a
+# replica. Background services keep using SessionLocal, which always talks
+# to the primary.
+RoutedSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    router=replica_router,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+)
+
+AsyncRoutedSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    sync_session_class=RoutingSession,
+    router=replica_router,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Create metadata and base class
 metadata = MetaData()
 Base = declarative_base(metadata=metadata)
 
 
-def get_db() -> Generator[Session, None, None]:
+# Requests that only read; any other method may read rows to modify them
+# (lookups, change diffs, auth checks) and must see the primary
+READ_ONLY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
     """
     Dependency to get database session
     """
-    db = SessionLocal()
+    db = RoutedSessionLocal()
+    if request.method not in READ_ONLY_METHODS:
+        pin_primary(db)
     try:
         yield db
     finally:
         db.close()
 
 
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get an async database session
+    """
+    async with AsyncRoutedSessionLocal() as db:
+        if request.method not in READ_ONLY_METHODS:
+            pin_primary(db)
+        yield db
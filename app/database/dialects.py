@@ -0,0 +1,20 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+
+def dialect_name(db: Session | AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def upsert_insert(db: Session, table):
+    """
+    INSERT construct supporting ON CONFLICT for the session's backend.
+    Both PostgreSQL and SQLite (>= 3.24) implement the same clause.
+    """
+    name = dialect_name(db)
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT inserts are not supported on {name}")
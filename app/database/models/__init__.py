@@ -1,4 +1,8 @@
 from .user import User
 from .tasks import Task
 from .activity import ActivityLog, ActivityType
+from .activity_rollup import ActivityRollup
+from .outbox import OutboxEvent
+from .consumer_offset import ConsumerOffset
+from .watermark import Watermark
 from ..database import Base, engine
\ No newline at end of file
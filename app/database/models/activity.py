@@ -1,10 +1,22 @@
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, Text, Enum as SqlEnum, ForeignKey
+from sqlalchemy import (
+    JSON, bindparam, Column, DateTime, Index, Integer, String, Enum as SqlEnum, ForeignKey, UniqueConstraint, func
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.core.config import settings
+from app.database import Base, engine
 from app.database.models.base import BaseModelMixin
 
 
+# Native range partitioning on created_at is PostgreSQL-only; SQLite (dev)
+# keeps a plain table and relies on DELETE-based retention.
+ACTIVITY_PARTITIONED = (
+    settings.activity_partitioning_enabled
+    and engine.dialect.name == "postgresql"
+)
+
+
 class ActivityType(str, PyEnum):
     TASK_CREATED = "task_created"
     TASK_UPDATED = "task_updated"
@@ -28,10 +40,64 @@ class ActivityLog(Base, BaseModelMixin):
 
     action = Column(String(255), nullable=False)
     request_id = Column(String(100), nullable=False)
-    data = Column(Text, nullable=True)
+    # JSONB on PostgreSQL, JSON1 text on SQLite
+    data = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+
+    # Id of the originating Kafka/outbox event, used to deduplicate ingestion
+    event_id = Column(String(36), nullable=True)
 
     user = relationship("User")
     task = relationship("Task")
 
+    if ACTIVITY_PARTITIONED:
+        # The partition key must be part of every unique constraint
+        id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+        created_at = Column(
+            DateTime(timezone=True),
+            primary_key=True,
+            server_default=func.now(),
+            nullable=False
+        )
+
+    # created_at is the event's occurred_at, so (event_id, created_at) is as
+    # unique as event_id alone and stays valid on a partitioned table.
+    __table_args__ = (
+        UniqueConstraint("event_id", "created_at", name="uq_activity_logs_event_id"),
+        # Containment lookups, e.g. data @> '{"changes": {"title": {}}}'
+        Index(
+            "ix_activity_logs_data_gin",
+            "data",
+            postgresql_using="gin",
+            postgresql_ops={"data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Keyset pagination on (created_at, id), optionally narrowed by one
+        # equality filter; each index serves ORDER BY created_at DESC, id DESC
+        Index("ix_activity_logs_created_at_id", "created_at", "id"),
+        Index("ix_activity_logs_user_created_at", "user_id", "created_at", "id"),
+        Index("ix_activity_logs_task_created_at", "task_id", "created_at", "id"),
+        Index("ix_activity_logs_type_created_at", "activity_type", "created_at", "id"),
+        Index("ix_activity_logs_request_id", "request_id"),
+        {
+            # Never reuse ids of deleted (archived) rows
+            "sqlite_autoincrement": True,
+            **({"postgresql_partition_by": "RANGE (created_at)"} if ACTIVITY_PARTITIONED else {}),
+        },
+    )
+
     def __repr__(self):
-        return f"<ActivityLog(id={self.id}, activity_type={self.activity_type}, user_id={self.user_id})>"
\ No newline at end of file
+        return f"<ActivityLog(id={self.id}, activity_type={self.activity_type}, user_id={self.user_id})>"
+
+
+def activity_data_key(key: str):
+    """
+    ``ActivityLog.data[key]`` with the key inlined as a SQL literal.
+    SQLite only uses an expression index when the query text matches it,
+    which a bound JSON path parameter never does.
+    """
+    return ActivityLog.data[
+        bindparam(None, key, literal_execute=True, type_=JSON.JSONIndexType)
+    ]
+
+
+# Resource id inside the payload (task id for task events)
+Index("ix_activity_logs_data_id", ActivityLog.data["id"].as_integer())
@@ -0,0 +1,29 @@
+from sqlalchemy import BigInteger, Column, DateTime, Enum as SqlEnum, Index, Integer, String, UniqueConstraint
+from app.database import Base
+from app.database.models.activity import ActivityType
+from app.database.models.base import BaseModelMixin
+
+
+class ActivityRollup(Base, BaseModelMixin):
+    """
+    Pre-aggregated activity counts per (granularity, bucket, type, user).
+    Granularity is one of "minute", "hour", "day".
+    """
+    __tablename__ = "activity_rollups"
+
+    granularity = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    activity_type = Column(SqlEnum(ActivityType), nullable=False)
+    user_id = Column(Integer, nullable=False)
+    count = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "activity_type", "user_id",
+            name="uq_activity_rollups_bucket",
+        ),
+        Index("ix_activity_rollups_user_bucket", "granularity", "user_id", "bucket_start"),
+    )
+
+    def __repr__(self):
+        return f"<ActivityRollup(granularity={self.granularity}, bucket_start={self.bucket_start}, activity_type={self.activity_type}, count={self.count})>"
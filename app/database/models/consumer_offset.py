@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, Integer, String, UniqueConstraint
+from app.database import Base
+from app.database.models.base import BaseModelMixin
+
+
+class ConsumerOffset(Base, BaseModelMixin):
+    """
+    Next Kafka offset to read per (group, topic, partition).
+
+    Stored in the same transaction as the rows a consumer derives from the
+    messages, so the DB, not Kafka, is the source of truth for progress.
+    """
+    __tablename__ = "consumer_offsets"
+
+    group_id = Column(String(255), nullable=False)
+    topic = Column(String(255), nullable=False)
+    partition = Column(Integer, nullable=False)
+    offset = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("group_id", "topic", "partition", name="uq_consumer_offsets_tp"),
+    )
+
+    def __repr__(self):
+        return f"<ConsumerOffset(group_id={self.group_id}, topic={self.topic}, partition={self.partition}, offset={self.offset})>"
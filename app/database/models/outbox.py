@@ -0,0 +1,35 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from app.database import Base
+from app.database.models.base import BaseModelMixin
+
+
+class OutboxEvent(Base, BaseModelMixin):
+    """
+    Domain event waiting to be relayed to Kafka.
+
+    Rows are written in the same transaction as the change they describe and
+    published later by ``OutboxRelay``.
+    """
+    __tablename__ = "outbox_events"
+
+    event_id = Column(String(36), nullable=False, unique=True)
+    event_type = Column(String(100), nullable=False)
+    topic = Column(String(255), nullable=False)
+    payload = Column(Text, nullable=False)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Relay scans unsent rows in insertion order
+        Index(
+            "ix_outbox_events_pending",
+            "id",
+            postgresql_where=sent_at.is_(None),
+            sqlite_where=sent_at.is_(None),
+        ),
+        Index("ix_outbox_events_sent_at", "sent_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, event_type={self.event_type}, sent_at={self.sent_at})>"
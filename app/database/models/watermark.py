@@ -0,0 +1,16 @@
+from sqlalchemy import BigInteger, Column, String
+from app.database import Base
+from app.database.models.base import BaseModelMixin
+
+
+class Watermark(Base, BaseModelMixin):
+    """
+    Named high-water mark for incremental background jobs.
+    """
+    __tablename__ = "watermarks"
+
+    name = Column(String(100), nullable=False, unique=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Watermark(name={self.name}, value={self.value})>"
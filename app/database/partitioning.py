@@ -0,0 +1,272 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.database.models.activity import ACTIVITY_PARTITIONED
+
+
+_PARTITION_NAME = re.compile(r"^activity_logs_p(\d{4})_(\d{2})(?:_(\d{2}))?$")
+
+
+class ActivityPartitionManager:
+    """
+    Maintains time-range partitions of ``activity_logs``.
+
+    On PostgreSQL the table is ``PARTITION BY RANGE (created_at)``; this
+    manager pre-creates the current and next ``premake`` partitions and
+    detaches (and optionally drops) partitions that fall entirely outside
+    the retention window, so cleanup never runs a bulk DELETE. With
+    ``retention_days`` 0 nothing is ever removed.
+
+    On other backends (SQLite in dev) partitioning is skipped. Retention
+    then falls back to a chunked DELETE, but only with
+    ``retention_delete_enabled``; by default such tables keep everything.
+    """
+
+    TABLE = "activity_logs"
+    DEFAULT_PARTITION = "activity_logs_default"
+    DELETE_CHUNK_SIZE = 5000
+
+    def __init__(
+        self,
+        *,
+        interval: str,
+        premake: int,
+        retention_days: int,
+        retention_action: str,
+        maintenance_interval_seconds: int,
+        retention_delete_enabled: bool = False,
+        enabled: bool = ACTIVITY_PARTITIONED,
+        session_factory=SessionLocal,
+    ):
+        if interval not in ("day", "month"):
+            raise ValueError(f"Unsupported partition interval: {interval}")
+        if retention_action not in ("drop", "detach"):
+            raise ValueError(f"Unsupported retention action: {retention_action}")
+
+        self._interval = interval
+        self._premake = premake
+        self._retention_days = retention_days
+        self._retention_action = retention_action
+        self._retention_delete = retention_delete_enabled
+        self._maintenance_interval = maintenance_interval_seconds
+        self._enabled = enabled
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    # Period helpers
+
+    def _period_start(self, moment: datetime) -> datetime:
+        moment = moment.astimezone(timezone.utc)
+        if self._interval == "day":
+            return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _next_period(start: datetime, interval: str) -> datetime:
+        if interval == "day":
+            return start + timedelta(days=1)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+
+    def _partition_name(self, start: datetime) -> str:
+        if self._interval == "day":
+            return f"{self.TABLE}_p{start:%Y_%m_%d}"
+        return f"{self.TABLE}_p{start:%Y_%m}"
+
+    @classmethod
+    def _parse_partition_name(cls, name: str) -> tuple[datetime, datetime] | None:
+        match = _PARTITION_NAME.match(name)
+        if not match:
+            return None
+        year, month, day = match.groups()
+        interval = "day" if day else "month"
+        start = datetime(int(year), int(month), int(day or 1), tzinfo=timezone.utc)
+        return start, cls._next_period(start, interval)
+
+    # Partition maintenance
+
+    def _is_partitioned_table(self, db) -> bool:
+        relkind = db.execute(
+            text("SELECT relkind FROM pg_class WHERE relname = :name"),
+            {"name": self.TABLE},
+        ).scalar()
+        if relkind != "p":
+            print(f"⚠️ {self.TABLE} is not a partitioned table; skipping partition maintenance")
+            return False
+        return True
+
+    def list_partitions(self, db) -> list[tuple[str, datetime, datetime]]:
+        """
+        Attached range partitions as (name, start, end), oldest first.
+        """
+        names = db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :name"
+            ),
+            {"name": self.TABLE},
+        ).scalars().all()
+
+        partitions = []
+        for name in names:
+            bounds = self._parse_partition_name(name)
+            if bounds:
+                partitions.append((name, *bounds))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def ensure_partitions(self, now: datetime | None = None) -> list[str]:
+        """
+        Create the default partition plus the current and upcoming ranges.
+        Returns the names of partitions that were newly created.
+        """
+        if not self._enabled:
+            return []
+
+        now = now or datetime.now(timezone.utc)
+        created = []
+        db = self._session_factory()
+        try:
+            if not self._is_partitioned_table(db):
+                return []
+
+            # Catches late or far-future rows so inserts never fail
+            db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.DEFAULT_PARTITION} "
+                f"PARTITION OF {self.TABLE} DEFAULT"
+            ))
+
+            existing = {name for name, _, _ in self.list_partitions(db)}
+            start = self._period_start(now)
+            for _ in range(self._premake + 1):
+                end = self._next_period(start, self._interval)
+                name = self._partition_name(start)
+                if name not in existing:
+                    try:
+                        with db.begin_nested():
+                            db.execute(text(
+                                f"CREATE TABLE {name} PARTITION OF {self.TABLE} "
+                                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                            ))
+                        created.append(name)
+                    except Exception as e:
+                        # e.g. overlaps a partition created with another interval
+                        print(f"⚠️ Could not create partition {name}:", str(e))
+                start = end
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        for name in created:
+            print(f"🧱 Created partition {name}")
+        return created
+
+    def apply_retention(self, now: datetime | None = None) -> list[str]:
+        """
+        Remove activity logs older than the retention window.
+        Returns the names of partitions that were detached/dropped.
+        """
+        if self._retention_days <= 0:
+            return []
+
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=self._retention_days)
+
+        if not self._enabled:
+            if self._retention_delete:
+                self._delete_before(cutoff)
+            return []
+
+        expired = []
+        db = self._session_factory()
+        try:
+            if not self._is_partitioned_table(db):
+                return []
+
+            for name, _, end in self.list_partitions(db):
+                if end > cutoff:
+                    break
+                db.execute(text(f"ALTER TABLE {self.TABLE} DETACH PARTITION {name}"))
+                if self._retention_action == "drop":
+                    db.execute(text(f"DROP TABLE {name}"))
+                expired.append(name)
+
+            # Late rows parked in the default partition are few; delete them
+            db.execute(
+                text(f"DELETE FROM {self.DEFAULT_PARTITION} WHERE created_at < :cutoff"),
+                {"cutoff": cutoff},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        verb = "Dropped" if self._retention_action == "drop" else "Detached"
+        for name in expired:
+            print(f"🧹 {verb} partition {name}")
+        return expired
+
+    def _delete_before(self, cutoff: datetime) -> int:
+        """
+        Fallback retention: delete in small chunks to keep transactions short.
+        """
+        deleted = 0
+        db = self._session_factory()
+        try:
+            while True:
+                result = db.execute(
+                    text(
+                        f"DELETE FROM {self.TABLE} WHERE id IN ("
+                        f"SELECT id FROM {self.TABLE} WHERE created_at < :cutoff LIMIT :limit)"
+                    ),
+                    {"cutoff": cutoff, "limit": self.DELETE_CHUNK_SIZE},
+                )
+                db.commit()
+                deleted += result.rowcount
+                if result.rowcount < self.DELETE_CHUNK_SIZE:
+                    break
+        finally:
+            db.close()
+
+        if deleted:
+            print(f"🧹 Deleted {deleted} expired activity logs")
+        return deleted
+
+    def run_maintenance(self) -> None:
+        self.ensure_partitions()
+        self.apply_retention()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_maintenance)
+            except Exception as e:
+                print("❌ Activity partition maintenance failed:", str(e))
+            await asyncio.sleep(self._maintenance_interval)
@@ -0,0 +1,278 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+try:
+    import greenlet
+except ImportError:  # only needed to see past the async engine's greenlet
+    greenlet = None
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import metrics
+
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ROOT_DIR = os.path.dirname(_APP_DIR)
+
+# Seconds; checkouts normally wait for nothing, timeouts default to 30s
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+HOLD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0)
+
+
+def _app_frame(frame) -> str | None:
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_APP_DIR + os.sep) and filename != __file__:
+            path = os.path.relpath(filename, _ROOT_DIR)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def call_site() -> str:
+    """
+    Innermost application frame that led to a pool checkout. Checkouts of
+    the async engine run in a greenlet whose stack stops at SQLAlchemy, so
+    the awaiting coroutine's stack is looked up in the parent greenlet.
+    """
+    site = _app_frame(sys._getframe(1))
+    if site is None and greenlet is not None:
+        parent = greenlet.getcurrent().parent
+        if parent is not None:
+            site = _app_frame(parent.gr_frame)
+    return site or "unknown"
+
+
+class PoolTracker:
+    """
+    Checkout bookkeeping and metrics for one engine's pool.
+
+    Every checked-out connection is recorded with the time and call site
+    that acquired it, so connections held for too long can be reported by
+    ``PoolMonitor`` with the code responsible.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Engine | None = None
+        # id(connection record) -> (checked out at, call site)
+        self._held: dict[int, tuple[float, str]] = {}
+        self._reported: set[int] = set()
+        self._lock = threading.Lock()
+
+        self.checkouts = metrics.counter(
+            "db_pool_checkouts_total", "Connections checked out of the pool", engine=name
+        )
+        self.timeouts = metrics.counter(
+            "db_pool_timeouts_total", "Checkouts that gave up waiting for a connection", engine=name
+        )
+        self.wait = metrics.histogram(
+            "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+            buckets=WAIT_BUCKETS, engine=name,
+        )
+        self.hold = metrics.histogram(
+            "db_pool_hold_seconds", "Time a connection stayed checked out",
+            buckets=HOLD_BUCKETS, engine=name,
+        )
+        self.in_use = metrics.gauge(
+            "db_pool_connections_in_use", "Connections currently checked out", engine=name
+        )
+        self.size = metrics.gauge(
+            "db_pool_size", "Connections the pool keeps open", engine=name
+        )
+        self.overflow = metrics.gauge(
+            "db_pool_overflow", "Connections open beyond the pool size", engine=name
+        )
+        self.long_held = metrics.counter(
+            "db_pool_long_held_total", "Checkouts held longer than the warning threshold", engine=name
+        )
+        self.oldest = metrics.gauge(
+            "db_pool_oldest_checkout_seconds", "Age of the oldest checked-out connection", engine=name
+        )
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self._held[id(connection_record)] = (time.monotonic(), call_site())
+            self.in_use.set(len(self._held))
+        self.checkouts.inc()
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            held = self._held.pop(id(connection_record), None)
+            self._reported.discard(id(connection_record))
+            self.in_use.set(len(self._held))
+        if held is not None:
+            self.hold.observe(time.monotonic() - held[0])
+
+    def check(self, threshold: float) -> list[dict]:
+        """
+        Update the pool gauges and return checkouts older than
+        ``threshold`` seconds that were not reported yet.
+        """
+        now = time.monotonic()
+        with self._lock:
+            held = list(self._held.items())
+
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, QueuePool):
+            self.size.set(pool.size())
+            self.overflow.set(max(pool.overflow(), 0))
+        self.oldest.set(max((now - since for _, (since, _) in held), default=0))
+
+        leaks = []
+        for key, (since, site) in held:
+            if now - since >= threshold and key not in self._reported:
+                self._reported.add(key)
+                self.long_held.inc()
+                leaks.append({
+                    "engine": self.name,
+                    "held_seconds": round(now - since, 3),
+                    "call_site": site,
+                })
+        return leaks
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            held = sorted(self._held.values())
+        pool = self.engine.pool if self.engine is not None else None
+        sized = isinstance(pool, QueuePool)
+        return {
+            "size": pool.size() if sized else None,
+            "checked_out": len(held),
+            "overflow": max(pool.overflow(), 0) if sized else None,
+            "checkouts": int(self.checkouts.value),
+            "timeouts": int(self.timeouts.value),
+            "wait": self.wait.snapshot(),
+            "held": [
+                {"held_seconds": round(now - since, 3), "call_site": site}
+                for since, site in held
+            ],
+        }
+
+
+_trackers: dict[str, PoolTracker] = {}
+
+
+def _tracker_for(pool) -> PoolTracker | None:
+    return _trackers.get(pool.logging_name or "")
+
+
+class _TimedCheckout:
+    """
+    Times how long ``_do_get`` waits for a free connection. The tracker is
+    found by the pool's logging name, which survives ``Pool.recreate()``.
+    """
+
+    def _do_get(self):
+        tracker = _tracker_for(self)
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if tracker is not None:
+                tracker.timeouts.inc()
+            raise
+        finally:
+            if tracker is not None:
+                tracker.wait.observe(time.perf_counter() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str) -> PoolTracker:
+    """
+    Track checkouts of ``engine``'s pool (the ``sync_engine`` of an async
+    engine). Pass the same ``name`` as ``pool_logging_name``.
+    """
+    tracker = _trackers.get(name) or PoolTracker(name)
+    _trackers[name] = tracker
+    tracker.engine = engine
+    event.listen(engine, "checkout", tracker.on_checkout)
+    event.listen(engine, "checkin", tracker.on_checkin)
+    return tracker
+
+
+def pool_trackers() -> list[PoolTracker]:
+    return list(_trackers.values())
+
+
+class PoolMonitor:
+    """
+    Periodically refreshes pool gauges and reports connections held longer
+    than ``hold_warn_ms``, with the call site that acquired them. Each
+    checkout is reported once.
+    """
+
+    def __init__(self, *, hold_warn_ms: int, interval_seconds: float):
+        self._threshold = hold_warn_ms / 1000
+        self._interval = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("🟢 DB pool monitor started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("🔴 DB pool monitor stopped")
+
+    def check_once(self) -> list[dict]:
+        leaks = []
+        for tracker in pool_trackers():
+            for leak in tracker.check(self._threshold):
+                print(
+                    f"⚠️ DB connection held {leak['held_seconds']:.1f}s "
+                    f"({leak['engine']}) by {leak['call_site']}"
+                )
+                leaks.append(leak)
+        return leaks
+
+    async def _run(self):
+        while True:
+            try:
+                self.check_once()
+            except Exception as e:
+                # NEVER crash the monitor loop
+                print("❌ DB pool check failed:", repr(e))
+            await asyncio.sleep(self._interval)
+
+    def stats(self) -> dict:
+        return {
+            "hold_warn_seconds": self._threshold,
+            "pools": {tracker.name: tracker.stats() for tracker in pool_trackers()},
+        }
+
+
+_pool_monitor: PoolMonitor | None = None
+
+
+def set_pool_monitor(monitor: PoolMonitor) -> None:
+    global _pool_monitor
+    _pool_monitor = monitor
+
+
+def get_pool_monitor_instance() -> PoolMonitor:
+    if _pool_monitor is None:
+        raise RuntimeError("DB pool monitor is not initialized")
+    return _pool_monitor
@@ -0,0 +1,269 @@
+import asyncio
+import itertools
+import threading
+import time
+
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+
+
+# Session.info keys
+PIN_PRIMARY = "pin_primary"
+USER_ID = "user_id"
+
+
+class Replica:
+    """
+    One read replica: a sync engine for threadpool sessions and an async
+    engine for AsyncSessions, sharing one health state.
+    """
+
+    def __init__(self, name: str, engine: Engine, async_engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.lag: float | None = None
+
+        self._healthy = metrics.gauge(
+            "db_replica_healthy", "1 if the replica passes health checks", replica=name
+        )
+        self._lag = metrics.gauge(
+            "db_replica_lag_seconds", "Replication replay lag (PostgreSQL)", replica=name
+        )
+        self._healthy.set(1)
+
+    def bind_for(self, primary: Engine) -> Engine:
+        return self.async_engine.sync_engine if primary.dialect.is_async else self.engine
+
+    def mark(self, healthy: bool, reason: str = "") -> None:
+        if healthy != self.healthy:
+            if healthy:
+                print(f"🟢 DB replica {self.name} is back")
+            else:
+                print(f"⚠️ DB replica {self.name} taken out of rotation: {reason}")
+        self.healthy = healthy
+        self._healthy.set(1 if healthy else 0)
+
+
+class ReplicaRouter:
+    """
+    Picks a replica for read-only work, round-robin over the healthy ones,
+    and remembers which users wrote recently.
+
+    A background loop probes every replica (``SELECT 1``, plus replay lag on
+    PostgreSQL) and takes failing or lagging ones out of rotation until they
+    pass again. With no healthy replica, reads go to the primary.
+
+    Users who wrote within ``read_your_writes_seconds`` are pinned to the
+    primary so they never read older data than they wrote. The window must
+    outlast the worst lag a replica can have while still in rotation
+    (``max_lag_seconds`` plus one health check interval). It is tracked per
+    process: a follow-up request served by another worker is not covered.
+    """
+
+    PROBE_TIMEOUT_SECONDS = 2
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        *,
+        health_check_interval_seconds: float,
+        max_lag_seconds: float,
+        read_your_writes_seconds: float,
+    ):
+        if replicas:
+            if max_lag_seconds <= 0:
+                raise ValueError(
+                    "DATABASE_REPLICA_MAX_LAG_SECONDS must be > 0 when replicas are configured"
+                )
+            if read_your_writes_seconds < max_lag_seconds + health_check_interval_seconds:
+                raise ValueError(
+                    "DATABASE_READ_YOUR_WRITES_SECONDS must be at least "
+                    "DATABASE_REPLICA_MAX_LAG_SECONDS + DATABASE_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS"
+                )
+
+        self.replicas = replicas
+        self._interval = health_check_interval_seconds
+        self._max_lag = max_lag_seconds
+        self._pin_window = read_your_writes_seconds
+        self._next = itertools.count()
+        self._writers: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+        self._routed = {
+            target: metrics.counter(
+                "db_statements_routed_total", "Statements of request sessions by target", target=target
+            )
+            for target in ("primary", "replica")
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Replica | None:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    def count(self, target: str) -> None:
+        self._routed[target].inc()
+
+    # Read-your-writes
+
+    def wrote(self, user_id: int | None) -> None:
+        if user_id is None or not self._pin_window:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writers[user_id] = now
+            if len(self._writers) > 10_000:
+                # Forget users whose window is over
+                self._writers = {
+                    uid: at for uid, at in self._writers.items() if now - at < self._pin_window
+                }
+
+    def recently_wrote(self, user_id: int) -> bool:
+        at = self._writers.get(user_id)
+        return at is not None and time.monotonic() - at < self._pin_window
+
+    # Health checks
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"🟢 DB replica router started ({len(self.replicas)} replicas)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            print("🔴 DB replica router stopped")
+        for replica in self.replicas:
+            await replica.async_engine.dispose()
+            replica.engine.dispose()
+
+    async def _run(self):
+        while True:
+            await self.check_once()
+            await asyncio.sleep(self._interval)
+
+    async def check_once(self) -> None:
+        await asyncio.gather(*(self._probe(replica) for replica in self.replicas))
+
+    async def _probe(self, replica: Replica) -> None:
+        try:
+            lag = await asyncio.wait_for(self._lag_of(replica), self.PROBE_TIMEOUT_SECONDS)
+        except Exception as e:
+            replica.mark(False, repr(e))
+            return
+
+        replica.lag = lag
+        replica._lag.set(lag or 0)
+        if self._max_lag and lag is not None and lag > self._max_lag:
+            replica.mark(False, f"lag {lag:.1f}s")
+        else:
+            replica.mark(True)
+
+    @staticmethod
+    async def _lag_of(replica: Replica) -> float | None:
+        async with replica.async_engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                await conn.execute(text("SELECT 1"))
+                return None
+            # NULL when not in recovery or nothing replayed yet. Everything
+            # received is replayed: caught up, however long the primary has
+            # been idle since its last commit
+            lag = await conn.scalar(text(
+                "SELECT CASE "
+                "WHEN NOT pg_is_in_recovery() THEN NULL "
+                "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            ))
+            return float(lag) if lag is not None else None
+
+    def stats(self) -> dict:
+        return {
+            "read_your_writes_seconds": self._pin_window,
+            "replicas": [
+                {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag}
+                for replica in self.replicas
+            ],
+            "routed": {target: int(counter.value) for target, counter in self._routed.items()},
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session for request handlers that sends plain SELECTs to a replica and
+    everything else (writes, SELECT ... FOR UPDATE, flushes) to the primary.
+
+    Once the session flushes it is pinned to the primary, so the rest of
+    the request reads its own writes; the writing user is also remembered
+    by the router (see ``pin_user``). Also used as the ``sync_session_class``
+    of async request sessions.
+    """
+
+    def __init__(self, *, router: ReplicaRouter, **kwargs):
+        super().__init__(**kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+        if not self.router.enabled:
+            return primary
+
+        replica = None
+        if (
+            not self.info.get(PIN_PRIMARY)
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            replica = self.router.pick()
+
+        if replica is None:
+            self.router.count("primary")
+            return primary
+        self.router.count("replica")
+        return replica.bind_for(primary)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_write(session: RoutingSession, flush_context) -> None:
+    session.info[PIN_PRIMARY] = True
+    session.router.wrote(session.info.get(USER_ID))
+
+
+def pin_user(db: Session | AsyncSession, user_id: int) -> None:
+    """
+    Attribute a request session to ``user_id``: its writes start the user's
+    read-your-writes window, and a user inside that window reads from the
+    primary. No-op for sessions that are not routed.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    if not isinstance(session, RoutingSession):
+        return
+    session.info[USER_ID] = user_id
+    if session.router.recently_wrote(user_id):
+        session.info[PIN_PRIMARY] = True
+
+
+def pin_primary(db: Session | AsyncSession) -> None:
+    """
+    Send every statement of a routed session to the primary, e.g. for
+    requests that read rows in order to modify them.
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info[PIN_PRIMARY] = True
@@ -0,0 +1,228 @@
+import asyncio
+import signal
+import time
+
+from aiokafka import AIOKafkaConsumer, TopicPartition
+from aiokafka.abc import ConsumerRebalanceListener
+
+from app.core.codecs import EventCodec, JsonCodec, codec_from_headers, get_codec
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.repositories.activity_repository import ActivityRepository
+from app.repositories.activity_rollup_repository import ActivityRollupRepository
+from app.repositories.consumer_offset_repository import ConsumerOffsetRepository
+from app.services.activity_service import ActivityService
+
+
+class _OffsetRestoringListener(ConsumerRebalanceListener):
+    """
+    Seeks newly assigned partitions to the offsets stored in the DB.
+    """
+
+    def __init__(self, sink: "ActivitySinkService"):
+        self._sink = sink
+
+    async def on_partitions_revoked(self, revoked):
+        # Progress is committed together with each batch; nothing to flush.
+        pass
+
+    async def on_partitions_assigned(self, assigned):
+        await self._sink.seek_to_stored_offsets(assigned)
+
+
+class ActivitySinkService:
+    """
+    Consumes the activity topic and persists ``ActivityLog`` rows.
+
+    Each ``getmany`` batch is written as one multi-row INSERT plus the next
+    offset per partition, in a single DB transaction. Kafka offsets are never
+    committed; on (re)assignment the consumer seeks to the DB-stored offsets,
+    so a restart resumes exactly where the last committed batch ended.
+    Rows are additionally deduplicated on ``event_id`` because the outbox
+    relay delivers at-least-once.
+    """
+
+    def __init__(
+        self,
+        *,
+        bootstrap_servers: str,
+        topic: str,
+        group_id: str,
+        max_records: int,
+        timeout_ms: int,
+        enabled: bool = True,
+        maintain_rollups: bool = False,
+        codec: EventCodec | None = None,
+        session_factory=SessionLocal,
+    ):
+        self._enabled = enabled
+        self._codec = codec or JsonCodec()
+        self._topic = topic
+        self._group_id = group_id
+        self._max_records = max_records
+        self._timeout_ms = timeout_ms
+        self._maintain_rollups = maintain_rollups
+        self._session_factory = session_factory
+        self._consumer: AIOKafkaConsumer | None = None
+
+        if enabled:
+            self._consumer = AIOKafkaConsumer(
+                bootstrap_servers=bootstrap_servers,
+                group_id=group_id,
+                enable_auto_commit=False,
+                auto_offset_reset="earliest",
+            )
+
+        self._inserted = metrics.counter(
+            "activity_sink_rows_inserted_total", "Activity rows inserted by the sink"
+        )
+        self._duplicates = metrics.counter(
+            "activity_sink_duplicates_total", "Events skipped because event_id already existed"
+        )
+        self._skipped = metrics.counter(
+            "activity_sink_invalid_total", "Messages that could not be mapped to an activity row"
+        )
+        self._batch_latency = metrics.histogram(
+            "activity_sink_batch_seconds", "Time to persist one consumed batch"
+        )
+
+    async def seek_to_stored_offsets(
+        self,
+        partitions,
+        fallback: dict[TopicPartition, int] | None = None,
+    ) -> None:
+        """
+        Seek partitions to their DB-stored offsets. Partitions without one
+        go to ``fallback`` if given, else keep auto_offset_reset (earliest).
+        """
+        offsets = await asyncio.to_thread(self._load_offsets)
+        for tp in partitions:
+            if tp.partition in offsets:
+                self._consumer.seek(tp, offsets[tp.partition])
+            elif fallback and tp in fallback:
+                self._consumer.seek(tp, fallback[tp])
+
+    def _load_offsets(self) -> dict[int, int]:
+        db = self._session_factory()
+        try:
+            return ConsumerOffsetRepository.get_offsets(
+                db, group_id=self._group_id, topic=self._topic
+            )
+        finally:
+            db.close()
+
+    async def start(self):
+        if not self._enabled or not self._consumer:
+            return
+
+        await self._consumer.start()
+        self._consumer.subscribe(
+            topics=[self._topic],
+            listener=_OffsetRestoringListener(self),
+        )
+        print("🟢 Activity sink started")
+
+        while True:
+            batch = await self._consumer.getmany(
+                timeout_ms=self._timeout_ms,
+                max_records=self._max_records,
+            )
+            if not batch:
+                continue
+
+            try:
+                await asyncio.to_thread(self._persist, batch)
+            except Exception as e:
+                print("❌ Activity sink batch failed, rewinding:", str(e))
+                # Nothing was committed: re-read the batch from stored
+                # offsets, or from its first record where none is stored
+                # yet. Partitions revoked meanwhile are re-seeked by the
+                # listener of whoever gets them.
+                assigned = self._consumer.assignment()
+                await self.seek_to_stored_offsets(
+                    [tp for tp in batch if tp in assigned],
+                    fallback={tp: messages[0].offset for tp, messages in batch.items() if messages},
+                )
+                await asyncio.sleep(1)
+
+    def _persist(self, batch: dict[TopicPartition, list]) -> None:
+        started = time.perf_counter()
+
+        rows: dict[str, dict] = {}
+        next_offsets: dict[int, int] = {}
+
+        for tp, messages in batch.items():
+            for message in messages:
+                next_offsets[tp.partition] = message.offset + 1
+                try:
+                    codec = codec_from_headers(message.headers, self._codec)
+                    event = codec.decode(message.value)
+                    row = ActivityService.activity_row_from_event(event)
+                except (KeyError, ValueError, TypeError) as e:
+                    self._skipped.inc()
+                    print(f"⚠️ Skipping message {tp.partition}:{message.offset}:", repr(e))
+                    continue
+                rows[row["event_id"]] = row
+
+        db = self._session_factory()
+        try:
+            inserted = ActivityRepository.bulk_create_ignore_duplicates(db, list(rows.values()))
+            if self._maintain_rollups:
+                # Only rows that were really inserted count; duplicates don't
+                ActivityRollupRepository.increment(db, inserted)
+            ConsumerOffsetRepository.save_offsets(
+                db,
+                group_id=self._group_id,
+                topic=self._topic,
+                offsets=next_offsets,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+            self._batch_latency.observe(time.perf_counter() - started)
+
+        self._inserted.inc(len(inserted))
+        self._duplicates.inc(len(rows) - len(inserted))
+
+    async def stop(self):
+        if self._consumer:
+            await self._consumer.stop()
+            print("🔴 Activity sink stopped")
+
+
+def build_activity_sink() -> ActivitySinkService:
+    return ActivitySinkService(
+        bootstrap_servers=settings.kafka_bootstrap_servers,
+        topic=settings.kafka_activity_topic,
+        group_id=settings.activity_sink_group_id,
+        max_records=settings.activity_sink_max_records,
+        timeout_ms=settings.activity_sink_timeout_ms,
+        enabled=settings.kafka_enabled,
+        maintain_rollups=settings.activity_rollup_mode == "incremental",
+        codec=get_codec(settings.kafka_codec),
+    )
+
+
+async def run_activity_sink() -> None:
+    """
+    Standalone sink process. Scale by running one per topic partition.
+    """
+    sink = build_activity_sink()
+    task = asyncio.create_task(sink.start())
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    task.cancel()
+    await sink.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_activity_sink())
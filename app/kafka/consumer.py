@@ -1,10 +1,40 @@
-import json
-from aiokafka import AIOKafkaConsumer
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable
 
-from app.websockets import admin_ws_manager
+from aiokafka import AIOKafkaConsumer, ConsumerRecord, TopicPartition
+from aiokafka.errors import IllegalStateError
+
+from app.core.codecs import EventCodec, JsonCodec, codec_from_headers
+from app.core.metrics import metrics
+from app.websockets import StreamEvent, admin_ws_manager
+
+
+# Receives one consumed batch, in partition order
+BatchHandler = Callable[[list[ConsumerRecord]], Awaitable[None]]
 
 
 class KafkaConsumerService:
+    """
+    Consumes the activity topic and pushes events to admin sockets.
+
+    In batch mode each ``getmany`` result is handed to every handler as one
+    list and offsets are committed once per batch, after all handlers
+    succeeded. A failed batch is re-read from its first offsets, so handlers
+    that already ran see it again; handlers with side effects nobody can
+    take back (e.g. socket sends) should not fail after them. Otherwise
+    every message is handed to the handlers as a batch of one and offsets
+    are auto-committed.
+
+    Per-partition lag (broker highwater minus our position) is refreshed on
+    every poll, including empty ones, so a stalled feed shows up as growing
+    lag; ``stats()`` reports it together with throughput and latencies.
+    """
+
+    # Messages/sec is averaged over this trailing window
+    THROUGHPUT_WINDOW_SECONDS = 60
+
     def __init__(
         self,
         *,
@@ -12,40 +42,239 @@ class KafkaConsumerService:
         topic: str,
         group_id: str,
         enabled: bool = True,
+        codec: EventCodec | None = None,
+        batch_mode: bool = True,
+        max_records: int = 500,
+        timeout_ms: int = 500,
+        handlers: list[BatchHandler] | None = None,
+        lag_alert_threshold: int = 10000,
     ):
+        # A batch is enqueued to every socket without yielding, so a socket
+        # queue must hold a whole batch
+        if enabled and batch_mode and max_records > admin_ws_manager.send_queue_size:
+            raise ValueError(
+                "KAFKA_CONSUMER_MAX_RECORDS must not exceed ADMIN_WS_SEND_QUEUE_SIZE"
+            )
+
         self._enabled = enabled
         self._topic = topic
+        self._group_id = group_id
+        # Used for messages without a codec header
+        self._codec = codec or JsonCodec()
+        self._batch_mode = batch_mode
+        self._max_records = max_records
+        self._timeout_ms = timeout_ms
+        self._handlers: list[BatchHandler] = handlers or [self.broadcast_batch]
         self._consumer: AIOKafkaConsumer | None = None
+        self._running = False
+
+        self._lag_alert_threshold = lag_alert_threshold
+        self._lagging = False
+        self._lag: dict[TopicPartition, dict] = {}
+        self._throughput: deque[tuple[float, int]] = deque()
+        self._last_batch_at: float | None = None
 
         if enabled:
             self._consumer = AIOKafkaConsumer(
                 topic,
                 bootstrap_servers=bootstrap_servers,
                 group_id=group_id,
-                value_deserializer=lambda v: json.loads(v.decode("utf-8")),
                 auto_offset_reset="earliest",
+                enable_auto_commit=not batch_mode,
             )
 
+        self._consumed = metrics.counter(
+            "kafka_consumer_messages_total", "Messages consumed by the admin consumer"
+        )
+        self._batch_sizes = metrics.histogram(
+            "kafka_consumer_batch_size",
+            "Messages per consumed batch",
+            buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+        )
+        self._batch_latency = metrics.histogram(
+            "kafka_consumer_batch_seconds", "Time to handle and commit one batch"
+        )
+        self._rate = metrics.gauge(
+            "kafka_consumer_messages_per_second",
+            f"Consumed messages/sec over the last {self.THROUGHPUT_WINDOW_SECONDS}s",
+        )
+        self._lag_total = metrics.gauge(
+            "kafka_consumer_lag_total", "Messages behind the highwater, all partitions"
+        )
+        self._lag_alert = metrics.gauge(
+            "kafka_consumer_lag_alert", "1 while total lag is above the alert threshold"
+        )
+
+    def add_handler(self, handler: BatchHandler) -> None:
+        self._handlers.append(handler)
+
+    def remove_handler(self, handler: BatchHandler) -> None:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
     async def start(self):
         if not self._enabled or not self._consumer:
             return
 
         await self._consumer.start()
+        self._running = True
         print("🟢 Kafka consumer started")
 
+        if self._batch_mode:
+            await self._consume_batches()
+            return
+
         async for message in self._consumer:
             print("📩 Event triggered")
-            print("Topic:", message.topic)
-            print("Payload:", message.value)
+            print("Topic:", message.topic, "| bytes:", len(message.value))
+
+            try:
+                # Same handlers as batch mode, e.g. the hub's forwarding
+                for handler in self._handlers:
+                    await handler([message])
+            except Exception as e:
+                print("❌ Kafka consumer handler failed:", repr(e))
+                continue
+
+            self._record_consumed(1)
+            await self._update_lag()
+
+    async def _consume_batches(self):
+        while True:
+            batch = await self._consumer.getmany(
+                timeout_ms=self._timeout_ms,
+                max_records=self._max_records,
+            )
+            if not batch:
+                await self._update_lag()
+                continue
+
+            started = time.perf_counter()
+            records = [record for records in batch.values() for record in records]
+
+            try:
+                for handler in self._handlers:
+                    await handler(records)
+                await self._consumer.commit()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Kafka consumer batch of {len(records)} failed, rewinding:", str(e))
+                # Partitions revoked meanwhile resume from the committed
+                # offset on their new owner
+                assigned = self._consumer.assignment()
+                for tp, messages in batch.items():
+                    if tp not in assigned:
+                        continue
+                    try:
+                        self._consumer.seek(tp, messages[0].offset)
+                    except IllegalStateError as e:
+                        print(f"⚠️ Could not rewind {tp}:", repr(e))
+                await asyncio.sleep(1)
+                continue
+
+            self._record_consumed(len(records))
+            self._batch_sizes.observe(len(records))
+            self._batch_latency.observe(time.perf_counter() - started)
+            await self._update_lag()
+            print(f"📩 Consumed batch of {len(records)} events")
+
+    async def broadcast_batch(self, records: list[ConsumerRecord]) -> None:
+        """
+        Default handler: forward the raw events to the admin sockets.
+        """
+        events = []
+        for record in records:
+            try:
+                codec = codec_from_headers(record.headers, self._codec)
+            except ValueError as e:
+                print("⚠️ Skipping undecodable message:", repr(e))
+                continue
+            events.append(StreamEvent(
+                record.topic, record.partition, record.offset, record.value, codec,
+                timestamp=record.timestamp,
+            ))
+
+        await admin_ws_manager.broadcast_raw_many(events)
+
+    # Instrumentation
+
+    def _record_consumed(self, count: int) -> None:
+        now = time.monotonic()
+        self._consumed.inc(count)
+        self._last_batch_at = now
+        self._throughput.append((now, count))
+        self._rate.set(self._messages_per_second(now))
+
+    def _messages_per_second(self, now: float) -> float:
+        cutoff = now - self.THROUGHPUT_WINDOW_SECONDS
+        while self._throughput and self._throughput[0][0] < cutoff:
+            self._throughput.popleft()
+        return sum(count for _, count in self._throughput) / self.THROUGHPUT_WINDOW_SECONDS
+
+    async def _update_lag(self) -> None:
+        assigned = self._consumer.assignment()
+        for tp in list(self._lag):
+            if tp not in assigned:
+                # Revoked in a rebalance; another consumer reports it now
+                metrics.gauge("kafka_consumer_lag", topic=tp.topic, partition=str(tp.partition)).set(0)
+                del self._lag[tp]
+
+        for tp in assigned:
+            highwater = self._consumer.highwater(tp)
+            if highwater is None:
+                # Not fetched yet
+                continue
+            position = await self._consumer.position(tp)
+            lag = max(0, highwater - position)
+            self._lag[tp] = {"position": position, "highwater": highwater, "lag": lag}
+            metrics.gauge(
+                "kafka_consumer_lag",
+                "Messages behind the highwater, per partition",
+                topic=tp.topic,
+                partition=str(tp.partition),
+            ).set(lag)
+
+        total = sum(entry["lag"] for entry in self._lag.values())
+        self._lag_total.set(total)
 
-            print("➡️ Calling admin_ws_manager.broadcast()")
-            await admin_ws_manager.broadcast({
-                "topic": message.topic,
-                "event": message.value,
-            })
+        lagging = total > self._lag_alert_threshold
+        if lagging != self._lagging:
+            self._lagging = lagging
+            self._lag_alert.set(1 if lagging else 0)
+            if lagging:
+                print(f"🚨 Kafka consumer lag {total} above threshold {self._lag_alert_threshold}")
+            else:
+                print(f"✅ Kafka consumer lag back under threshold ({total})")
 
+    def stats(self) -> dict:
+        now = time.monotonic()
+        total = sum(entry["lag"] for entry in self._lag.values())
+        return {
+            "enabled": self._enabled,
+            "running": self._running,
+            "topic": self._topic,
+            "group_id": self._group_id,
+            "partitions": [
+                {"topic": tp.topic, "partition": tp.partition, **entry}
+                for tp, entry in sorted(self._lag.items())
+            ],
+            "lag_total": total,
+            "lag_alert_threshold": self._lag_alert_threshold,
+            "lagging": total > self._lag_alert_threshold,
+            "messages_total": int(self._consumed.value),
+            "messages_per_second": self._messages_per_second(now),
+            "seconds_since_last_batch": (
+                now - self._last_batch_at if self._last_batch_at is not None else None
+            ),
+            "batch_seconds": self._batch_latency.snapshot(),
+            "ws_send_seconds": admin_ws_manager.send_latency.snapshot(),
+            "admin_sockets": admin_ws_manager.stats(),
+            "delivery_seconds": admin_ws_manager.delivery_latency.snapshot(),
+        }
 
     async def stop(self):
+        self._running = False
         if self._consumer:
             await self._consumer.stop()
             print("🔴 Kafka consumer stopped")
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.kafka.producer import KafkaProducerService
+from app.repositories.outbox_repository import OutboxRepository
+
+
+class OutboxRelay:
+    """
+    Publishes committed outbox rows to Kafka in batches and marks them sent.
+
+    Delivery is at-least-once: a crash between publish and mark_sent
+    re-publishes the batch, so consumers deduplicate on ``event_id``.
+    """
+
+    PURGE_EVERY_SECONDS = 300
+
+    def __init__(
+        self,
+        *,
+        producer: KafkaProducerService,
+        batch_size: int,
+        poll_interval_ms: int,
+        retention_hours: int,
+        session_factory=SessionLocal,
+    ):
+        self._producer = producer
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval_ms / 1000
+        self._retention = timedelta(hours=retention_hours)
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+        self._last_purge = 0.0
+
+        self._published = metrics.counter(
+            "outbox_events_published_total", "Outbox events delivered to Kafka"
+        )
+        self._failed = metrics.counter(
+            "outbox_events_failed_total", "Outbox publish attempts that failed"
+        )
+        self._batch_latency = metrics.histogram(
+            "outbox_relay_batch_seconds", "Time to publish and mark one outbox batch"
+        )
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("🟢 Outbox relay started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("🔴 Outbox relay stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                relayed = await self.relay_once()
+                await self._maybe_purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # NEVER crash the relay loop
+                print("❌ Outbox relay error:", str(e))
+                relayed = 0
+
+            # Keep draining while there is a backlog
+            if relayed < self._batch_size:
+                await asyncio.sleep(self._poll_interval)
+
+    async def relay_once(self) -> int:
+        """
+        Publish one batch of pending rows. Returns the number marked sent.
+        """
+        started = time.perf_counter()
+        db = self._session_factory()
+        try:
+            rows = await asyncio.to_thread(
+                OutboxRepository.fetch_pending, db, self._batch_size
+            )
+            if not rows:
+                await asyncio.to_thread(db.rollback)
+                return 0
+
+            results = await self._producer.publish_batch(
+                messages=[(row.topic, json.loads(row.payload)) for row in rows]
+            )
+
+            # Only the prefix before the first failure is marked sent, so the
+            # next attempt resumes in order.
+            sent_ids = []
+            for row, error in zip(rows, results):
+                if error is not None:
+                    break
+                sent_ids.append(row.id)
+            failed_ids = [row.id for row in rows[len(sent_ids):]]
+
+            def _finish():
+                OutboxRepository.mark_sent(db, sent_ids)
+                OutboxRepository.mark_failed(db, failed_ids)
+                db.commit()
+
+            await asyncio.to_thread(_finish)
+
+            self._published.inc(len(sent_ids))
+            if failed_ids:
+                self._failed.inc(len(failed_ids))
+                print(f"⚠️ Outbox publish failed for {len(failed_ids)} events:", results[len(sent_ids)])
+
+            return len(sent_ids)
+
+        except Exception:
+            await asyncio.to_thread(db.rollback)
+            raise
+
+        finally:
+            db.close()
+            self._batch_latency.observe(time.perf_counter() - started)
+
+    async def _maybe_purge(self):
+        now = time.monotonic()
+        if now - self._last_purge < self.PURGE_EVERY_SECONDS:
+            return
+        self._last_purge = now
+
+        cutoff = datetime.now(timezone.utc) - self._retention
+
+        def _purge():
+            db = self._session_factory()
+            try:
+                deleted = OutboxRepository.purge_sent(db, cutoff)
+                db.commit()
+                return deleted
+            finally:
+                db.close()
+
+        deleted = await asyncio.to_thread(_purge)
+        if deleted:
+            print(f"🧹 Purged {deleted} sent outbox events")
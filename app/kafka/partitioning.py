@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import Counter
+
+from app.core.metrics import metrics
+
+
+PARTITION_KEY_STRATEGIES = ("actor", "resource", "root_task", "none")
+
+
+def event_partition_key(event: dict, strategy: str) -> str | None:
+    """
+    Kafka message key for a ``BaseEvent`` dict.
+
+    - actor: ``user:<actor id>``, one user's events stay in order
+    - resource: ``<resource type>:<resource id>``
+    - root_task: ``task:<root task id>``, a task tree's events stay in order;
+      non-task resources fall back to the resource key
+    - none: no key (round-robin partitioning)
+    """
+    if strategy == "none":
+        return None
+
+    actor = event.get("actor") or {}
+    resource = event.get("resource") or {}
+
+    if strategy == "actor":
+        return f"user:{actor['id']}" if actor.get("id") is not None else None
+
+    if resource.get("id") is None:
+        return None
+
+    if strategy == "root_task" and resource.get("type") == "task":
+        return f"task:{resource.get('root_id') or resource['id']}"
+    return f"{resource.get('type', 'resource')}:{resource['id']}"
+
+
+class HotKeyDetector:
+    """
+    Counts message keys and partitions over a tumbling window and reports
+    skew when the window closes.
+
+    ``key_skew`` is the busiest key's count over the mean count per key;
+    ``hot_key_share`` is its fraction of all keyed messages. A warning is
+    printed when the share crosses ``share_threshold``.
+    """
+
+    def __init__(
+        self,
+        *,
+        window_seconds: int,
+        share_threshold: float,
+        top_n: int = 5,
+        min_messages: int = 100,
+    ):
+        self._window = window_seconds
+        self._share_threshold = share_threshold
+        self._top_n = top_n
+        self._min_messages = min_messages
+        self._lock = threading.Lock()
+
+        self._keys: Counter = Counter()
+        self._partitions: Counter = Counter()
+        self._window_started = time.monotonic()
+        self._last_report: dict = {}
+
+        self._key_skew = metrics.gauge(
+            "kafka_producer_key_skew", "Busiest key count / mean count per key (last window)"
+        )
+        self._hot_key_share = metrics.gauge(
+            "kafka_producer_hot_key_share", "Share of keyed messages sent with the busiest key"
+        )
+        self._partition_skew = metrics.gauge(
+            "kafka_producer_partition_skew", "Busiest partition count / mean count per partition"
+        )
+
+    def record_key(self, key: str | None) -> None:
+        if key is None:
+            return
+        with self._lock:
+            self._maybe_roll()
+            self._keys[key] += 1
+
+    def record_partition(self, partition: int) -> None:
+        with self._lock:
+            self._partitions[partition] += 1
+
+    def _maybe_roll(self) -> None:
+        now = time.monotonic()
+        if now - self._window_started < self._window:
+            return
+
+        self._last_report = self._summarize()
+        self._keys.clear()
+        self._partitions.clear()
+        self._window_started = now
+
+        report = self._last_report
+        self._key_skew.set(report["key_skew"])
+        self._hot_key_share.set(report["hot_key_share"])
+        self._partition_skew.set(report["partition_skew"])
+
+        if report["messages"] >= self._min_messages and report["hot_key_share"] >= self._share_threshold:
+            key, count = report["top_keys"][0]
+            print(
+                f"🔥 Hot Kafka key {key}: {count}/{report['messages']} messages "
+                f"({report['hot_key_share']:.0%}) in the last {self._window}s"
+            )
+
+    def _summarize(self) -> dict:
+        total = sum(self._keys.values())
+        top = self._keys.most_common(self._top_n)
+        key_mean = total / len(self._keys) if self._keys else 0
+        partition_mean = (
+            sum(self._partitions.values()) / len(self._partitions) if self._partitions else 0
+        )
+        return {
+            "window_seconds": self._window,
+            "messages": total,
+            "distinct_keys": len(self._keys),
+            "top_keys": top,
+            "key_skew": top[0][1] / key_mean if top else 0.0,
+            "hot_key_share": top[0][1] / total if top else 0.0,
+            "partitions": dict(sorted(self._partitions.items())),
+            "partition_skew": (
+                max(self._partitions.values()) / partition_mean if partition_mean else 0.0
+            ),
+        }
+
+    def report(self) -> dict:
+        """
+        Last completed window, or the current one if none has closed yet.
+        """
+        with self._lock:
+            self._maybe_roll()
+            return self._last_report or self._summarize()
@@ -1,27 +1,117 @@
-import json
 import asyncio
+import time
+from typing import Callable
+
 from aiokafka.errors import KafkaConnectionError
 from aiokafka import AIOKafkaProducer
+from aiokafka.codec import has_gzip, has_lz4, has_snappy, has_zstd
+
+from app.core.codecs import CODEC_HEADER, EventCodec, JsonCodec
+from app.core.metrics import metrics
+from app.kafka.partitioning import PARTITION_KEY_STRATEGIES, HotKeyDetector, event_partition_key
+
+
+
+_CODEC_AVAILABLE = {
+    "gzip": has_gzip,
+    "lz4": has_lz4,
+    "snappy": has_snappy,
+    "zstd": has_zstd,
+}
+
+# Called with (topic, message, exception) when a delivery fails
+FailureCallback = Callable[[str, dict, Exception], None]
+
+
+def _resolve_compression(compression_type: str | None) -> str | None:
+    if not compression_type or compression_type == "none":
+        return None
+    if compression_type not in _CODEC_AVAILABLE:
+        raise ValueError(f"Unsupported compression type: {compression_type}")
+    if not _CODEC_AVAILABLE[compression_type]():
+        # Codec library missing (aiokafka[lz4,zstd] pulls in cramjam)
+        print(f"⚠️ Kafka compression '{compression_type}' unavailable, falling back to gzip")
+        return "gzip"
+    return compression_type
 
 
 class KafkaProducerService:
+    """
+    Thin wrapper around ``AIOKafkaProducer``.
+
+    ``publish_batch`` hands every message to the producer's buffer before
+    waiting on any of them; aiokafka groups buffered messages per partition
+    (``linger_ms`` / ``max_batch_size``) and compresses each batch. Delivery
+    is tracked through the send futures: counters for in-flight, acked and
+    failed messages, plus an optional failure callback.
+
+    Messages are keyed from the event (see ``event_partition_key``) so all
+    events of one actor / resource / task tree land on the same partition
+    and are consumed in order.
+
+    Broker outages lose nothing: events reach Kafka through the outbox
+    relay, whose rows stay pending until ``publish_batch`` reports them
+    acknowledged. If the broker was unreachable at startup, a background
+    loop keeps reconnecting; until then ``publish_batch`` fails fast and
+    the relay retries later.
+    """
+
+    RECONNECT_SECONDS = 5
+
     def __init__(
         self,
         *,
         bootstrap_servers: str,
         client_id: str,
         enabled: bool = True,
+        linger_ms: int = 0,
+        max_batch_size: int = 16384,
+        compression_type: str | None = None,
+        acks: str = "all",
+        key_strategy: str = "none",
+        hot_key_detector: HotKeyDetector | None = None,
+        codec: EventCodec | None = None,
+        on_failure: FailureCallback | None = None,
     ):
+        if key_strategy not in PARTITION_KEY_STRATEGIES:
+            raise ValueError(f"Unsupported partition key strategy: {key_strategy}")
+
         self._enabled = enabled
+        self._on_failure = on_failure
+        self._key_strategy = key_strategy
+        self._hot_keys = hot_key_detector
+        self._codec = codec or JsonCodec()
+        # Lets consumers decode values regardless of the producer's codec
+        self._headers = [(CODEC_HEADER, self._codec.name.encode("utf-8"))]
+        self._reconnect_task: asyncio.Task | None = None
+        self._available = False
         self._producer: AIOKafkaProducer | None = None
 
         if enabled:
             self._producer = AIOKafkaProducer(
                 bootstrap_servers=bootstrap_servers,
                 client_id=client_id,
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+                value_serializer=self._codec.encode,
+                key_serializer=lambda k: k.encode("utf-8") if k is not None else None,
+                linger_ms=linger_ms,
+                max_batch_size=max_batch_size,
+                compression_type=_resolve_compression(compression_type),
+                acks=int(acks) if acks in ("0", "1") else acks,
             )
 
+        self._in_flight = metrics.gauge(
+            "kafka_producer_in_flight", "Messages buffered or sent but not yet acknowledged"
+        )
+        self._acked = metrics.counter(
+            "kafka_producer_acked_total", "Messages acknowledged by the broker"
+        )
+        self._failed = metrics.counter(
+            "kafka_producer_failed_total", "Messages that failed to be delivered"
+        )
+        self._ack_latency = metrics.histogram(
+            "kafka_producer_ack_seconds", "Time from send to broker acknowledgement"
+        )
+
     async def start(self, retries: int = 10, delay: int = 3):
         if not self._enabled or not self._producer:
             return
@@ -29,26 +119,154 @@ class KafkaProducerService:
         for attempt in range(1, retries + 1):
             try:
                 await self._producer.start()
+                self._available = True
                 print("🟢 Kafka producer connected")
                 return
-            except KafkaConnectionError as e:
+            except KafkaConnectionError:
                 print(f"⏳ Kafka not ready (attempt {attempt}/{retries})")
                 await asyncio.sleep(delay)
 
-        print("❌ Kafka producer failed after retries")
+        print("❌ Kafka producer failed after retries, reconnecting in the background")
+        self._reconnect_task = asyncio.create_task(self._reconnect_loop())
 
 
     async def stop(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            try:
+                await self._reconnect_task
+            except asyncio.CancelledError:
+                pass
+            self._reconnect_task = None
+
         if self._producer:
+            # stop() flushes buffered batches and waits for their acks
             await self._producer.stop()
             print("🔴 Kafka producer stopped")
 
-    async def publish(self, *, topic: str, message: dict):
-        if not self._enabled:
+    def stats(self) -> dict:
+        return {
+            "in_flight": int(self._in_flight.value),
+            "acked": int(self._acked.value),
+            "failed": int(self._failed.value),
+            "available": self._available,
+            "hot_keys": self._hot_keys.report() if self._hot_keys else None,
+        }
+
+    def _fail(
+        self,
+        topic: str,
+        message: dict,
+        error: BaseException,
+    ) -> None:
+        """
+        Count an undeliverable message and run the failure callback.
+        """
+        self._failed.inc()
+        if self._on_failure is None:
             return
+        try:
+            self._on_failure(topic, message, error)
+        except Exception as e:
+            print("❌ Kafka failure callback raised:", str(e))
+
+    def _track(
+        self,
+        future: asyncio.Future,
+        topic: str,
+        message: dict,
+    ) -> asyncio.Future:
+        """
+        Account for one send future: in-flight until it resolves, then
+        acked or failed (running the failure callback).
+        """
+        self._in_flight.inc()
+        started = time.perf_counter()
+
+        def _done(fut: asyncio.Future):
+            self._in_flight.dec()
+            error = asyncio.CancelledError() if fut.cancelled() else fut.exception()
+
+            if error is None:
+                self._acked.inc()
+                self._ack_latency.observe(time.perf_counter() - started)
+                if self._hot_keys:
+                    self._hot_keys.record_partition(fut.result().partition)
+                return
+
+            self._fail(topic, message, error)
+
+        future.add_done_callback(_done)
+        return future
+
+    async def _send(
+        self,
+        topic: str,
+        message: dict,
+    ) -> asyncio.Future:
+        """
+        Hand one message to aiokafka and return its delivery future.
+        """
+        key = event_partition_key(message, self._key_strategy)
+
+        if self._hot_keys:
+            self._hot_keys.record_key(key)
+
+        try:
+            # Waits only for buffer space / metadata, not for the broker
+            future = await self._producer.send(topic, message, key=key, headers=self._headers)
+        except Exception as e:
+            self._fail(topic, message, e)
+            raise
+        return self._track(future, topic, message)
+
+    async def publish_batch(self, *, messages: list[tuple[str, dict]]) -> list[Exception | None]:
+        """
+        Send many messages without waiting on each one, then wait for all
+        deliveries. Returns one entry per message: None on success, the
+        exception otherwise.
+        """
+        if not self._enabled:
+            return [None] * len(messages)
 
         if not self._producer:
             raise RuntimeError("Kafka producer not initialized")
 
-        await self._producer.send_and_wait(topic, message)
+        if not self._available:
+            # Fail fast; the caller retries from its own store
+            return [KafkaConnectionError("Kafka unavailable")] * len(messages)
+
+        futures = []
+        for topic, message in messages:
+            try:
+                futures.append(await self._send(topic, message))
+            except Exception as e:
+                futures.append(e)
+
+        results = []
+        for future in futures:
+            if isinstance(future, Exception):
+                results.append(future)
+                continue
+            try:
+                await future
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # Reconnect
 
+    async def _reconnect_loop(self):
+        """
+        Keep trying to connect after ``start`` ran out of retries.
+        """
+        while True:
+            await asyncio.sleep(self.RECONNECT_SECONDS)
+            try:
+                await self._producer.start()
+            except Exception:
+                continue
+            self._available = True
+            print("🟢 Kafka producer connected")
+            return
@@ -1,6 +1,8 @@
+from app.kafka.consumer import KafkaConsumerService
 from app.kafka.producer import KafkaProducerService
 
 _kafka_producer: KafkaProducerService | None = None
+_kafka_consumer: KafkaConsumerService | None = None
 
 
 def set_kafka_producer(producer: KafkaProducerService) -> None:
@@ -12,3 +14,14 @@ def get_kafka_producer_instance() -> KafkaProducerService:
     if _kafka_producer is None:
         raise RuntimeError("Kafka producer is not initialized")
     return _kafka_producer
+
+
+def set_kafka_consumer(consumer: KafkaConsumerService) -> None:
+    global _kafka_consumer
+    _kafka_consumer = consumer
+
+
+def get_kafka_consumer_instance() -> KafkaConsumerService:
+    if _kafka_consumer is None:
+        raise RuntimeError("Kafka consumer is not initialized")
+    return _kafka_consumer
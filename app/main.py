@@ -1,4 +1,5 @@
 import asyncio
+import socket
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,13 +7,25 @@ from fastapi.staticfiles import StaticFiles
 
 from app.api.v1 import api_router
 from app.api.v1.endpoints import admin_router
+from app.core.codecs import get_codec
 from app.core.config import settings
+from app.database import async_engine, replica_router
 from app.database.models import Base, engine
+from app.database.partitioning import ActivityPartitionManager
+from app.database.pool import PoolMonitor, set_pool_monitor
 from app.database.scripts import create_admin_user
 from app.middleware import setup_middlewares
 from app.exceptions import setup_exception_handlers
 from app.kafka import KafkaProducerService, KafkaConsumerService
-from app.kafka.registry import set_kafka_producer
+from app.kafka.activity_sink import build_activity_sink
+from app.kafka.outbox_relay import OutboxRelay
+from app.kafka.partitioning import HotKeyDetector
+from app.kafka.registry import set_kafka_consumer, set_kafka_producer
+from app.services.activity_archive import ActivityArchiver, get_activity_archive
+from app.services.activity_rollup_service import ActivityRollupJob
+from app.services.activity_writer import ActivityWriter, set_activity_writer
+from app.websockets.fanout import ActivityStreamHub
+from app.websockets.replay import StreamReplayer, set_stream_replayer
 from app.websockets.routes import router as websocket_router
 
 # Import Kafka consumer/producer startup functions if needed
@@ -27,13 +40,77 @@ async def lifespan(app: FastAPI):
         bootstrap_servers=settings.kafka_bootstrap_servers,
         client_id=settings.kafka_client_id,
         enabled=settings.kafka_enabled,
+        linger_ms=settings.kafka_producer_linger_ms,
+        max_batch_size=settings.kafka_producer_max_batch_size,
+        compression_type=settings.kafka_producer_compression_type,
+        acks=settings.kafka_producer_acks,
+        key_strategy=settings.kafka_partition_key_strategy,
+        hot_key_detector=HotKeyDetector(
+            window_seconds=settings.kafka_hot_key_window_seconds,
+            share_threshold=settings.kafka_hot_key_share_threshold,
+        ),
+        codec=get_codec(settings.kafka_codec),
     )
     # Initialize Kafka Consumer singleton per application
     kafka_consumer = KafkaConsumerService(
         bootstrap_servers=settings.kafka_bootstrap_servers,
         topic=settings.kafka_activity_topic,
-        group_id=settings.kafka_group_id,
+        group_id=(
+            # Each host must read every partition once
+            f"{settings.kafka_group_id}-{socket.gethostname()}"
+            if settings.admin_stream_mode == "hub"
+            else settings.kafka_group_id
+        ),
         enabled=settings.kafka_enabled,
+        codec=get_codec(settings.kafka_codec),
+        batch_mode=settings.kafka_consumer_batch_mode,
+        max_records=settings.kafka_consumer_max_records,
+        timeout_ms=settings.kafka_consumer_timeout_ms,
+        lag_alert_threshold=settings.kafka_consumer_lag_alert_threshold,
+    )
+    # Initialize batched activity log writer
+    activity_writer = ActivityWriter(
+        batch_size=settings.activity_writer_batch_size,
+        linger_ms=settings.activity_writer_linger_ms,
+        max_queue_size=settings.activity_writer_queue_size,
+        maintain_rollups=settings.activity_rollup_mode == "incremental",
+    )
+    # Initialize rollup catch-up job (only used in "catchup" mode)
+    rollup_job = ActivityRollupJob(
+        batch_size=settings.activity_rollup_batch_size,
+        interval_seconds=settings.activity_rollup_interval_seconds,
+        lag_seconds=settings.activity_rollup_lag_seconds,
+    )
+    # Initialize activity_logs partition / retention manager
+    partition_manager = ActivityPartitionManager(
+        interval=settings.activity_partition_interval,
+        premake=settings.activity_partition_premake,
+        retention_days=settings.activity_retention_days,
+        retention_action=settings.activity_retention_action,
+        retention_delete_enabled=settings.activity_retention_delete_enabled,
+        maintenance_interval_seconds=settings.activity_maintenance_interval_seconds,
+    )
+    # Initialize cold archiver (old activity_logs -> segment files)
+    activity_archive = get_activity_archive()
+    activity_archiver = None
+    if activity_archive:
+        activity_archiver = ActivityArchiver(
+            archive=activity_archive,
+            archive_after_days=settings.activity_archive_after_days,
+            segment_rows=settings.activity_archive_segment_rows,
+            interval_seconds=settings.activity_archive_interval_seconds,
+        )
+    # Initialize DB pool monitor (gauges, long-held connection reports)
+    pool_monitor = PoolMonitor(
+        hold_warn_ms=settings.database_connection_hold_warn_ms,
+        interval_seconds=settings.database_pool_monitor_interval_seconds,
+    )
+    # Initialize outbox relay (outbox table -> Kafka)
+    outbox_relay = OutboxRelay(
+        producer=kafka_producer,
+        batch_size=settings.outbox_relay_batch_size,
+        poll_interval_ms=settings.outbox_relay_poll_interval_ms,
+        retention_hours=settings.outbox_retention_hours,
     )
 
     # Startup
@@ -47,9 +124,27 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     print("Tables created")
 
+    await pool_monitor.start()
+    set_pool_monitor(pool_monitor)
+    await replica_router.start()
+
+    # Partitions must exist before the first activity insert
+    partition_manager.ensure_partitions()
+    await partition_manager.start()
+    if activity_archiver:
+        await activity_archiver.start()
+
     # Create Admin User
     create_admin_user()
 
+    # Start Activity Writer
+    await activity_writer.start()
+    set_activity_writer(activity_writer)
+
+    # Start Activity Rollup catch-up job
+    if settings.activity_rollup_mode == "catchup":
+        await rollup_job.start()
+
     # Start Kafka Producer
     # await init_kafka_producer()
     try:
@@ -59,8 +154,37 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print("⚠️ Kafka not available, continuing without Kafka:", e)
 
+    # Start Outbox Relay
+    await outbox_relay.start()
 
-    consumer_task = asyncio.create_task(kafka_consumer.start())
+    # Start admin activity stream (Kafka consumer, or per-host hub)
+    set_kafka_consumer(kafka_consumer)
+    set_stream_replayer(StreamReplayer(
+        bootstrap_servers=settings.kafka_bootstrap_servers,
+        topic=settings.kafka_activity_topic,
+        rate=settings.admin_replay_rate,
+        enabled=settings.kafka_enabled,
+        codec=get_codec(settings.kafka_codec),
+    ))
+    stream_hub = None
+    if settings.admin_stream_mode == "hub":
+        stream_hub = ActivityStreamHub(
+            consumer=kafka_consumer,
+            socket_path=settings.admin_stream_socket_path,
+            lock_path=settings.admin_stream_lock_path,
+            max_buffer_bytes=settings.admin_stream_max_buffer_bytes,
+            codec=get_codec(settings.kafka_codec),
+        )
+        consumer_task = asyncio.create_task(stream_hub.run())
+    else:
+        consumer_task = asyncio.create_task(kafka_consumer.start())
+
+    # Start embedded Activity Sink (dev only; run it as its own process in prod)
+    activity_sink = None
+    sink_task = None
+    if settings.activity_sink_embedded:
+        activity_sink = build_activity_sink()
+        sink_task = asyncio.create_task(activity_sink.start())
 
     # Start Kafka Consumer (async loop)
     # asyncio.create_task(start_kafka_consumer())
@@ -73,8 +197,25 @@ async def lifespan(app: FastAPI):
     # Close Kafka Connections
     # await close_kafka_producer()
     consumer_task.cancel()
+    await outbox_relay.stop()
     await kafka_producer.stop()
     await kafka_consumer.stop()
+    if stream_hub:
+        await stream_hub.stop()
+    if activity_sink:
+        sink_task.cancel()
+        await activity_sink.stop()
+
+    # Flush pending activity logs
+    await activity_writer.stop()
+    await rollup_job.stop()
+    await partition_manager.stop()
+    if activity_archiver:
+        await activity_archiver.stop()
+
+    await pool_monitor.stop()
+    await replica_router.stop()
+    await async_engine.dispose()
 
     print("🛑 FastAPI shutting down...")
 
@@ -1,6 +1,82 @@
-from sqlalchemy.orm import Session
+from datetime import datetime
+from sqlalchemy import Select, and_, func, insert, or_, select, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session
+from app.database.dialects import dialect_name, upsert_insert
 from app.database.models import ActivityLog
-from app.database.models.activity import ActivityType
+from app.database.models.activity import ActivityType, activity_data_key
+
+
+def _json_scalar(expr, value):
+    # Pick the typed accessor so SQLite compares native values, not JSON text
+    if isinstance(value, bool):
+        return expr.as_boolean()
+    if isinstance(value, int):
+        return expr.as_integer()
+    if isinstance(value, float):
+        return expr.as_float()
+    return expr.as_string()
+
+
+# Task / subtask updates keep {"changes": {field: {"old", "new"}}}; profile
+# updates keep {field: new value}
+_TASK_CHANGE_TYPES = (ActivityType.TASK_UPDATED, ActivityType.SUBTASK_UPDATED)
+
+
+def _changed_field_condition(dialect: str, field: str, new_value):
+    if dialect == "postgresql":
+        data = type_coerce(ActivityLog.data, JSONB)
+        change = {} if new_value is None else {"new": new_value}
+        task_change = data.contains({"changes": {field: change}})
+        profile_change = (
+            data.has_key(field) if new_value is None else data.contains({field: new_value})
+        )
+    elif new_value is None:
+        task_change = ActivityLog.data[("changes", field)].as_string().is_not(None)
+        # json_type: a field set to null still counts as changed
+        profile_change = func.json_type(ActivityLog.data, f"$.{field}").is_not(None)
+    else:
+        task_change = _json_scalar(
+            ActivityLog.data[("changes", field, "new")], new_value
+        ) == new_value
+        profile_change = _json_scalar(ActivityLog.data[field], new_value) == new_value
+
+    # The type filter lets SQLite use ix_activity_logs_type_created_at
+    return or_(
+        and_(ActivityLog.activity_type.in_(_TASK_CHANGE_TYPES), task_change),
+        and_(ActivityLog.activity_type == ActivityType.PROFILE_UPDATED, profile_change),
+    )
+
+
+def _page_conditions(
+    *,
+    user_id: int | None,
+    task_id: int | None,
+    activity_type: ActivityType | None,
+    request_id: str | None,
+    start: datetime | None,
+    end: datetime | None,
+    before: tuple[datetime, int] | None,
+) -> list:
+    conditions = []
+    if user_id is not None:
+        conditions.append(ActivityLog.user_id == user_id)
+    if task_id is not None:
+        conditions.append(ActivityLog.task_id == task_id)
+    if activity_type is not None:
+        conditions.append(ActivityLog.activity_type == activity_type)
+    if request_id is not None:
+        conditions.append(ActivityLog.request_id == request_id)
+    if start is not None:
+        conditions.append(ActivityLog.created_at >= start)
+    if end is not None:
+        conditions.append(ActivityLog.created_at < end)
+    if before is not None:
+        conditions.append(
+            tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(*before)
+        )
+    return conditions
 
 
 class ActivityRepository:
@@ -12,7 +88,7 @@ class ActivityRepository:
         activity_type: ActivityType,
         action: str,
         request_id: str,
-        data: str | None = None,
+        data: dict | None = None,
         task_id: int | None = None,
     ) -> ActivityLog:
         activity = ActivityLog(
@@ -26,3 +102,263 @@ class ActivityRepository:
         db.add(activity)
         db.commit()
         return activity
+
+    @staticmethod
+    def bulk_create(db: Session, rows: list[dict]) -> None:
+        """
+        Insert many activity rows in a single multi-row INSERT.
+        Caller owns the transaction.
+        """
+        if not rows:
+            return
+        db.execute(insert(ActivityLog), rows)
+
+    @staticmethod
+    def bulk_create_ignore_duplicates(db: Session, rows: list[dict]) -> list[dict]:
+        """
+        Multi-row INSERT that skips rows whose event_id already exists.
+        Returns (activity_type, user_id, created_at) of the rows actually
+        inserted. Caller owns the transaction.
+        """
+        if not rows:
+            return []
+        stmt = (
+            upsert_insert(db, ActivityLog)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["event_id", "created_at"])
+            .returning(ActivityLog.activity_type, ActivityLog.user_id, ActivityLog.created_at)
+        )
+        return [dict(row._mapping) for row in db.execute(stmt)]
+
+    @staticmethod
+    def get_in_range(
+        db: Session,
+        *,
+        start: datetime,
+        end: datetime,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        """
+        Activity in [start, end), newest first. The created_at bounds let
+        PostgreSQL prune every partition outside the range.
+        """
+        return (
+            db.query(ActivityLog)
+            .filter(
+                ActivityLog.created_at >= start,
+                ActivityLog.created_at < end,
+            )
+            .order_by(ActivityLog.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def _bounded(
+        query: Query,
+        *,
+        start: datetime | None,
+        end: datetime | None,
+        limit: int,
+    ) -> list[ActivityLog]:
+        if start is not None:
+            query = query.filter(ActivityLog.created_at >= start)
+        if end is not None:
+            query = query.filter(ActivityLog.created_at < end)
+        return query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def get_by_data_id(
+        db: Session,
+        resource_id: int,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        """
+        Activity whose payload ``id`` equals resource_id.
+        Served by the ix_activity_logs_data_id expression index.
+        """
+        query = db.query(ActivityLog).filter(
+            activity_data_key("id").as_integer() == resource_id
+        )
+        return ActivityRepository._bounded(query, start=start, end=end, limit=limit)
+
+    @staticmethod
+    def get_by_changed_field(
+        db: Session,
+        field: str,
+        *,
+        new_value: str | int | float | bool | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        """
+        Updates that changed ``field`` (optionally to ``new_value``): task
+        updates listing it under ``changes`` and profile updates carrying
+        it at the top level.
+
+        On PostgreSQL this is a JSONB containment test served by the GIN
+        index; elsewhere it falls back to json_extract on the update types.
+        """
+        condition = _changed_field_condition(dialect_name(db), field, new_value)
+        query = db.query(ActivityLog).filter(condition)
+        return ActivityRepository._bounded(query, start=start, end=end, limit=limit)
+
+    @staticmethod
+    def list_page(
+        db: Session,
+        *,
+        user_id: int | None = None,
+        task_id: int | None = None,
+        activity_type: ActivityType | None = None,
+        request_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+        limit: int = 50,
+    ) -> list[ActivityLog]:
+        """
+        One page of activity, newest first, using keyset pagination.
+
+        ``before`` is the (created_at, id) of the last row of the previous
+        page. Seeking with a row-value comparison instead of OFFSET keeps
+        every page an index range scan, however deep the client pages.
+        """
+        query = db.query(ActivityLog).filter(*_page_conditions(
+            user_id=user_id,
+            task_id=task_id,
+            activity_type=activity_type,
+            request_id=request_id,
+            start=start,
+            end=end,
+            before=before,
+        ))
+
+        return (
+            query
+            .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+
+class AsyncActivityRepository:
+    """
+    Reads and single-row writes of ``ActivityRepository`` over an
+    ``AsyncSession``. Bulk inserts stay on the sync repository, used by the
+    background writers.
+    """
+
+    @staticmethod
+    async def create(
+        db: AsyncSession,
+        *,
+        user_id: int,
+        activity_type: ActivityType,
+        action: str,
+        request_id: str,
+        data: dict | None = None,
+        task_id: int | None = None,
+    ) -> ActivityLog:
+        activity = ActivityLog(
+            user_id=user_id,
+            task_id=task_id,
+            activity_type=activity_type,
+            action=action,
+            request_id=request_id,
+            data=data,
+        )
+        db.add(activity)
+        await db.commit()
+        return activity
+
+    @staticmethod
+    async def _bounded(
+        db: AsyncSession,
+        stmt: Select,
+        *,
+        start: datetime | None,
+        end: datetime | None,
+        limit: int,
+    ) -> list[ActivityLog]:
+        if start is not None:
+            stmt = stmt.where(ActivityLog.created_at >= start)
+        if end is not None:
+            stmt = stmt.where(ActivityLog.created_at < end)
+        stmt = stmt.order_by(ActivityLog.created_at.desc()).limit(limit)
+        return list(await db.scalars(stmt))
+
+    @staticmethod
+    async def get_in_range(
+        db: AsyncSession,
+        *,
+        start: datetime,
+        end: datetime,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        return await AsyncActivityRepository._bounded(
+            db, select(ActivityLog), start=start, end=end, limit=limit
+        )
+
+    @staticmethod
+    async def get_by_data_id(
+        db: AsyncSession,
+        resource_id: int,
+        *,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        stmt = select(ActivityLog).where(
+            activity_data_key("id").as_integer() == resource_id
+        )
+        return await AsyncActivityRepository._bounded(db, stmt, start=start, end=end, limit=limit)
+
+    @staticmethod
+    async def get_by_changed_field(
+        db: AsyncSession,
+        field: str,
+        *,
+        new_value: str | int | float | bool | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        limit: int = 100,
+    ) -> list[ActivityLog]:
+        condition = _changed_field_condition(dialect_name(db), field, new_value)
+        stmt = select(ActivityLog).where(condition)
+        return await AsyncActivityRepository._bounded(db, stmt, start=start, end=end, limit=limit)
+
+    @staticmethod
+    async def list_page(
+        db: AsyncSession,
+        *,
+        user_id: int | None = None,
+        task_id: int | None = None,
+        activity_type: ActivityType | None = None,
+        request_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+        limit: int = 50,
+    ) -> list[ActivityLog]:
+        """
+        Keyset-paginated page, newest first (see ``ActivityRepository.list_page``).
+        """
+        stmt = (
+            select(ActivityLog)
+            .where(*_page_conditions(
+                user_id=user_id,
+                task_id=task_id,
+                activity_type=activity_type,
+                request_id=request_id,
+                start=start,
+                end=end,
+                before=before,
+            ))
+            .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+            .limit(limit)
+        )
+        return list(await db.scalars(stmt))
@@ -0,0 +1,110 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database.dialects import upsert_insert
+from app.database.models import ActivityRollup
+from app.database.models.activity import ActivityType
+
+
+GRANULARITIES = ("minute", "hour", "day")
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    # SQLite hands back naive datetimes; they are UTC
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+
+    if granularity == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+class ActivityRollupRepository:
+    @staticmethod
+    def increment(db: Session, rows: Iterable[dict]) -> None:
+        """
+        Add activity rows (activity_type, user_id, created_at) to every
+        rollup granularity. Counts are aggregated in memory first so a batch
+        costs one upsert statement. Caller owns the transaction.
+        """
+        counts: Counter = Counter()
+        for row in rows:
+            for granularity in GRANULARITIES:
+                counts[(
+                    granularity,
+                    bucket_start(row["created_at"], granularity),
+                    row["activity_type"],
+                    row["user_id"],
+                )] += 1
+
+        if not counts:
+            return
+
+        stmt = upsert_insert(db, ActivityRollup).values([
+            {
+                "granularity": granularity,
+                "bucket_start": bucket,
+                "activity_type": activity_type,
+                "user_id": user_id,
+                "count": count,
+            }
+            for (granularity, bucket, activity_type, user_id), count in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "bucket_start", "activity_type", "user_id"],
+            set_={"count": ActivityRollup.count + stmt.excluded["count"]},
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def series(
+        db: Session,
+        *,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        activity_type: ActivityType | None = None,
+        user_id: int | None = None,
+        group_by: str = "type",
+    ) -> list[dict]:
+        """
+        Summed counts per bucket, split by activity type or by user.
+        """
+        split = ActivityRollup.activity_type if group_by == "type" else ActivityRollup.user_id
+
+        query = (
+            db.query(
+                ActivityRollup.bucket_start,
+                split,
+                func.sum(ActivityRollup.count),
+            )
+            .filter(
+                ActivityRollup.granularity == granularity,
+                ActivityRollup.bucket_start >= bucket_start(start, granularity),
+                ActivityRollup.bucket_start < end,
+            )
+        )
+        if activity_type is not None:
+            query = query.filter(ActivityRollup.activity_type == activity_type)
+        if user_id is not None:
+            query = query.filter(ActivityRollup.user_id == user_id)
+
+        key = "activity_type" if group_by == "type" else "user_id"
+        return [
+            {"bucket_start": bucket, key: value, "count": int(total)}
+            for bucket, value, total in (
+                query
+                .group_by(ActivityRollup.bucket_start, split)
+                .order_by(ActivityRollup.bucket_start)
+                .all()
+            )
+        ]
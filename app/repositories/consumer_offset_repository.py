@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+from app.database.dialects import upsert_insert
+from app.database.models import ConsumerOffset
+
+
+class ConsumerOffsetRepository:
+    @staticmethod
+    def get_offsets(db: Session, *, group_id: str, topic: str) -> dict[int, int]:
+        rows = (
+            db.query(ConsumerOffset.partition, ConsumerOffset.offset)
+            .filter(
+                ConsumerOffset.group_id == group_id,
+                ConsumerOffset.topic == topic,
+            )
+            .all()
+        )
+        return {partition: offset for partition, offset in rows}
+
+    @staticmethod
+    def save_offsets(
+        db: Session,
+        *,
+        group_id: str,
+        topic: str,
+        offsets: dict[int, int],
+    ) -> None:
+        """
+        Upsert next-offset per partition. Caller owns the transaction.
+        """
+        if not offsets:
+            return
+
+        stmt = upsert_insert(db, ConsumerOffset).values([
+            {
+                "group_id": group_id,
+                "topic": topic,
+                "partition": partition,
+                "offset": offset,
+            }
+            for partition, offset in offsets.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["group_id", "topic", "partition"],
+            set_={"offset": stmt.excluded.offset},
+        )
+        db.execute(stmt)
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timezone
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database.models import OutboxEvent
+
+
+class OutboxRepository:
+    @staticmethod
+    def add(db: Session | AsyncSession, *, topic: str, event: dict) -> OutboxEvent:
+        """
+        Stage an event in the caller's transaction. Does not commit.
+        """
+        row = OutboxEvent(
+            event_id=event["event_id"],
+            event_type=event["event_type"],
+            topic=topic,
+            payload=json.dumps(event),
+        )
+        db.add(row)
+        return row
+
+    @staticmethod
+    def fetch_pending(db: Session, limit: int) -> list[OutboxEvent]:
+        """
+        Oldest unsent events. Rows are locked (SKIP LOCKED) where the backend
+        supports it so several relays can run side by side.
+        """
+        return (
+            db.query(OutboxEvent)
+            .filter(OutboxEvent.sent_at.is_(None))
+            .order_by(OutboxEvent.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    @staticmethod
+    def mark_sent(db: Session, ids: list[int]) -> None:
+        if not ids:
+            return
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .values(sent_at=datetime.now(timezone.utc))
+        )
+
+    @staticmethod
+    def mark_failed(db: Session, ids: list[int]) -> None:
+        if not ids:
+            return
+        db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .values(attempts=OutboxEvent.attempts + 1)
+        )
+
+    @staticmethod
+    def purge_sent(db: Session, older_than: datetime) -> int:
+        result = db.execute(
+            delete(OutboxEvent).where(
+                OutboxEvent.sent_at.is_not(None),
+                OutboxEvent.sent_at < older_than,
+            )
+        )
+        return result.rowcount
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.database.models import Task
 
@@ -6,12 +8,22 @@ class TaskRepository:
     def __init__(self, db: Session):
         self.db = db
 
+    def _save(self, task: Task, commit: bool) -> None:
+        # commit=False lets the caller add more work (e.g. outbox rows)
+        # to the same transaction; flush still assigns ids.
+        if commit:
+            self.db.commit()
+            self.db.refresh(task)
+        else:
+            self.db.flush()
+
     def create(
         self,
         user_id: int,
         title: str,
         description: str | None,
         parent_task_id: int | None,
+        commit: bool = True,
     ) -> Task:
         task = Task(
             user_id=user_id,
@@ -20,23 +32,94 @@ class TaskRepository:
             parent_task_id=parent_task_id,
         )
         self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
+        self._save(task, commit)
         return task
 
     def get_by_id(self, task_id: int) -> Task | None:
         return self.db.query(Task).filter(Task.id == task_id, Task.is_deleted == False).first()
     
-    def update(self, task: Task, data: dict) -> Task:
+    def get_root_id(self, task: Task) -> int:
+        """
+        Id of the top-level task of ``task``'s tree (deleted ancestors count).
+        """
+        root_id, parent_id = task.id, task.parent_task_id
+        seen = {root_id}
+        while parent_id is not None and parent_id not in seen:
+            root_id = parent_id
+            seen.add(root_id)
+            parent_id = self.db.query(Task.parent_task_id).filter(Task.id == root_id).scalar()
+        return root_id
+
+    def update(self, task: Task, data: dict, commit: bool = True) -> Task:
         for key, value in data.items():
             setattr(task, key, value)
-        self.db.commit()
-        self.db.refresh(task)
+        self._save(task, commit)
         return task
     
-    def delete(self, task: Task) -> None:
+    def delete(self, task: Task, commit: bool = True) -> None:
         task.is_deleted = True
-        self.db.commit()
-        self.db.refresh(task)
+        self._save(task, commit)
         return
 
+
+class AsyncTaskRepository:
+    """
+    ``TaskRepository`` over an ``AsyncSession``.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _save(self, task: Task, commit: bool) -> None:
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(task)
+        else:
+            await self.db.flush()
+
+    async def create(
+        self,
+        user_id: int,
+        title: str,
+        description: str | None,
+        parent_task_id: int | None,
+        commit: bool = True,
+    ) -> Task:
+        task = Task(
+            user_id=user_id,
+            title=title,
+            description=description,
+            parent_task_id=parent_task_id,
+        )
+        self.db.add(task)
+        await self._save(task, commit)
+        return task
+
+    async def get_by_id(self, task_id: int) -> Task | None:
+        return await self.db.scalar(
+            select(Task).where(Task.id == task_id, Task.is_deleted.is_(False)).limit(1)
+        )
+
+    async def get_root_id(self, task: Task) -> int:
+        """
+        Id of the top-level task of ``task``'s tree (deleted ancestors count).
+        """
+        root_id, parent_id = task.id, task.parent_task_id
+        seen = {root_id}
+        while parent_id is not None and parent_id not in seen:
+            root_id = parent_id
+            seen.add(root_id)
+            parent_id = await self.db.scalar(
+                select(Task.parent_task_id).where(Task.id == root_id)
+            )
+        return root_id
+
+    async def update(self, task: Task, data: dict, commit: bool = True) -> Task:
+        for key, value in data.items():
+            setattr(task, key, value)
+        await self._save(task, commit)
+        return task
+
+    async def delete(self, task: Task, commit: bool = True) -> None:
+        task.is_deleted = True
+        await self._save(task, commit)
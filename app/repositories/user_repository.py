@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.database.models import User
 
@@ -40,8 +42,59 @@ class UserRepository:
         self.db.refresh(user)
         return user
 
-    def update(self, user: User) -> User:
+    def update(self, user: User, commit: bool = True) -> User:
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
\ No newline at end of file
+        if commit:
+            self.db.commit()
+            self.db.refresh(user)
+        else:
+            self.db.flush()
+        return user
+
+
+class AsyncUserRepository:
+    """
+    ``UserRepository`` over an ``AsyncSession``.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_by_email(self, email: str) -> User | None:
+        return await self.db.scalar(
+            select(User).where(User.email == email, User.is_deleted.is_(False)).limit(1)
+        )
+
+    async def get_by_id(self, user_id: int) -> User | None:
+        return await self.db.scalar(
+            select(User).where(User.id == user_id, User.is_deleted.is_(False)).limit(1)
+        )
+
+    async def create(
+        self,
+        *,
+        email: str,
+        firstname: str,
+        lastname: str,
+        hashed_password: str,
+    ) -> User:
+        user = User(
+            email=email,
+            firstname=firstname,
+            lastname=lastname,
+            hashed_password=hashed_password,
+            is_admin=False,
+        )
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        return user
+
+    async def update(self, user: User, commit: bool = True) -> User:
+        self.db.add(user)
+        if commit:
+            await self.db.commit()
+            await self.db.refresh(user)
+        else:
+            await self.db.flush()
+        return user
@@ -0,0 +1,38 @@
+from sqlalchemy.orm import Session
+from app.database.dialects import upsert_insert
+from app.database.models import Watermark
+
+
+class WatermarkRepository:
+    @staticmethod
+    def get_for_update(db: Session, name: str) -> int:
+        """
+        Read the watermark and lock it until the caller's transaction ends,
+        so jobs in other processes wait instead of reading the same value.
+        The row is created first so there is always one to lock; on SQLite
+        that write takes the database write lock.
+        """
+        db.execute(
+            upsert_insert(db, Watermark)
+            .values(name=name, value=0)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        value = (
+            db.query(Watermark.value)
+            .filter(Watermark.name == name)
+            .with_for_update()
+            .scalar()
+        )
+        return value or 0
+
+    @staticmethod
+    def set(db: Session, name: str, value: int) -> None:
+        """
+        Upsert the watermark. Caller owns the transaction.
+        """
+        stmt = upsert_insert(db, Watermark).values(name=name, value=value)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"value": stmt.excluded.value},
+        )
+        db.execute(stmt)
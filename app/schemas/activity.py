@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Any, Literal, Optional
+from pydantic import BaseModel
+
+from app.database.models.activity import ActivityType
+
+
+class ActivityLogResponse(BaseModel):
+    id: int
+    user_id: int
+    task_id: Optional[int]
+    activity_type: ActivityType
+    action: str
+    request_id: str
+    event_id: Optional[str]
+    data: Optional[Any]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ActivityPageResponse(BaseModel):
+    items: list[ActivityLogResponse]
+    # Opaque; pass back as ?cursor= to get the next (older) page
+    next_cursor: Optional[str]
+
+
+class ActivityRollupPoint(BaseModel):
+    bucket_start: datetime
+    activity_type: Optional[ActivityType] = None
+    user_id: Optional[int] = None
+    count: int
+
+
+class ActivityStatsResponse(BaseModel):
+    granularity: str
+    start: datetime
+    end: datetime
+    points: list[ActivityRollupPoint]
+
+
+class ActivitySubscription(BaseModel):
+    """
+    Client message on /ws/admin/activity selecting which events it gets.
+    Values within a field are OR-ed, fields are AND-ed; empty fields match
+    everything, so an empty subscription means every event.
+    """
+    type: Literal["subscribe"]
+    event_types: list[str] = []
+    actor_ids: list[int] = []
+    # Matches the task, its subtasks and, for a root task, the whole tree
+    task_ids: list[int] = []
+    resource_types: list[str] = []
@@ -0,0 +1,370 @@
+import asyncio
+import gzip
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.database.models import ActivityLog
+from app.database.models.activity import ActivityType
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single worker
+    fcntl = None
+
+
+def as_utc(moment: datetime) -> datetime:
+    # SQLite returns naive datetimes; they are UTC
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+class ActivityArchive:
+    """
+    Compressed NDJSON segment files holding cold activity logs.
+
+    Each segment stores rows ordered by (created_at, id). ``index.json``
+    keeps, per segment, the min/max created_at and the set of user ids so
+    queries can skip segments without opening them. Segments are gzip
+    compressed.
+
+    Writers in several processes (one archiver per uvicorn worker) must
+    hold ``exclusive()`` while they archive.
+    """
+
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "archive.lock"
+
+    def __init__(self, directory: str):
+        self._dir = Path(directory)
+        self._lock = threading.Lock()
+        self._index: list[dict] | None = None
+        self._index_mtime: float | None = None
+
+    # Index
+
+    def segments(self) -> list[dict]:
+        path = self._dir / self.INDEX_FILE
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            if self._index is None or mtime != self._index_mtime:
+                self._index = json.loads(path.read_text())
+                self._index_mtime = mtime
+            return self._index
+
+    def _write_index(self, segments: list[dict]) -> None:
+        tmp = self._dir / f"{self.INDEX_FILE}.tmp"
+        tmp.write_text(json.dumps(segments))
+        os.replace(tmp, self._dir / self.INDEX_FILE)
+
+    @contextmanager
+    def exclusive(self):
+        """
+        Non-blocking ``flock`` on the archive directory, shared by all
+        processes using it. Yields False if another process holds it.
+        """
+        if fcntl is None:
+            yield True
+            return
+
+        self._dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._dir / self.LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    # Segment IO
+
+    @staticmethod
+    def _open(path: Path, mode: str):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+
+    @staticmethod
+    def _serialize(activity: ActivityLog) -> dict:
+        return {
+            "id": activity.id,
+            "user_id": activity.user_id,
+            "task_id": activity.task_id,
+            "activity_type": activity.activity_type.value,
+            "action": activity.action,
+            "request_id": activity.request_id,
+            "event_id": activity.event_id,
+            "data": activity.data,
+            "created_at": as_utc(activity.created_at).isoformat(),
+        }
+
+    @staticmethod
+    def _deserialize(row: dict) -> ActivityLog:
+        # Transient instance: never added to a session
+        return ActivityLog(
+            id=row["id"],
+            user_id=row["user_id"],
+            task_id=row["task_id"],
+            activity_type=ActivityType(row["activity_type"]),
+            action=row["action"],
+            request_id=row["request_id"],
+            event_id=row["event_id"],
+            data=row["data"],
+            created_at=datetime.fromisoformat(row["created_at"]),
+        )
+
+    def write_segment(self, activities: list[ActivityLog]) -> dict:
+        """
+        Persist rows (already ordered by created_at, id) as a new segment and
+        register it in the index. Returns the index entry.
+        """
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+        first, last = activities[0], activities[-1]
+        name = f"segment-{as_utc(first.created_at):%Y%m%dT%H%M%S}-{first.id}-{last.id}.ndjson.gz"
+        path = self._dir / name
+        tmp = self._dir / f"{name}.tmp"
+
+        with self._open(tmp, "w") as fh:
+            for activity in activities:
+                fh.write(json.dumps(self._serialize(activity)))
+                fh.write("\n")
+        os.replace(tmp, path)
+
+        entry = {
+            "file": name,
+            "rows": len(activities),
+            "min_created_at": as_utc(first.created_at).isoformat(),
+            "max_created_at": as_utc(last.created_at).isoformat(),
+            "min_id": min(a.id for a in activities),
+            "max_id": max(a.id for a in activities),
+            "user_ids": sorted({a.user_id for a in activities}),
+        }
+        # A retry after a failed delete rewrites the same file: replace its
+        # entry rather than listing the segment twice
+        self._write_index([*(e for e in self.segments() if e["file"] != name), entry])
+        return entry
+
+    def read_segment(self, entry: dict) -> list[ActivityLog]:
+        path = self._dir / entry["file"]
+        with self._open(path, "r") as fh:
+            return [self._deserialize(json.loads(line)) for line in fh if line.strip()]
+
+    # Query
+
+    def query(
+        self,
+        *,
+        user_id: int | None = None,
+        task_id: int | None = None,
+        activity_type: ActivityType | None = None,
+        request_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        before: tuple[datetime, int] | None = None,
+        limit: int = 50,
+    ) -> list[ActivityLog]:
+        """
+        Archived rows matching the filters, newest first, mirroring
+        ``ActivityRepository.list_page``. Segments whose time range or user
+        set cannot match are skipped without being read.
+        """
+        start = as_utc(start) if start else None
+        end = as_utc(end) if end else None
+        before = (as_utc(before[0]), before[1]) if before else None
+        upper = min(filter(None, [end, before[0] if before else None]), default=None)
+
+        candidates = []
+        for entry in self.segments():
+            seg_min = datetime.fromisoformat(entry["min_created_at"])
+            seg_max = datetime.fromisoformat(entry["max_created_at"])
+            if start and seg_max < start:
+                continue
+            if upper and seg_min > upper:
+                continue
+            if user_id is not None and user_id not in entry["user_ids"]:
+                continue
+            candidates.append((seg_max, entry))
+
+        # Newest segments first; stop once no remaining segment can beat the
+        # oldest row we would return
+        candidates.sort(key=lambda c: c[0], reverse=True)
+
+        matches: list[ActivityLog] = []
+        # Rows archived again by a retried run can sit in two segments
+        seen: set[int] = set()
+        for seg_max, entry in candidates:
+            if len(matches) >= limit and seg_max < as_utc(matches[limit - 1].created_at):
+                break
+
+            for activity in self.read_segment(entry):
+                created_at = as_utc(activity.created_at)
+                if user_id is not None and activity.user_id != user_id:
+                    continue
+                if task_id is not None and activity.task_id != task_id:
+                    continue
+                if activity_type is not None and activity.activity_type != activity_type:
+                    continue
+                if request_id is not None and activity.request_id != request_id:
+                    continue
+                if start and created_at < start:
+                    continue
+                if end and created_at >= end:
+                    continue
+                if before and (created_at, activity.id) >= before:
+                    continue
+                if activity.id in seen:
+                    continue
+                seen.add(activity.id)
+                matches.append(activity)
+
+            matches.sort(key=lambda a: (as_utc(a.created_at), a.id), reverse=True)
+            del matches[limit:]
+
+        return matches[:limit]
+
+
+class ActivityArchiver:
+    """
+    Moves activity logs older than ``archive_after_days`` from the DB into
+    archive segments, oldest first, one segment per iteration.
+
+    The segment and index are written before the rows are deleted; a crash
+    in between leaves rows in both places, which the merged query path
+    deduplicates by id. The retry archives the same rows again, rewriting
+    the segment file and its index entry; ``ActivityArchive.query`` also
+    skips ids already returned by another segment.
+
+    Every uvicorn worker runs an archiver; an iteration only runs while it
+    holds the archive's ``flock``, so workers never archive the same rows or
+    overwrite each other's index entries.
+    """
+
+    def __init__(
+        self,
+        *,
+        archive: ActivityArchive,
+        archive_after_days: int,
+        segment_rows: int,
+        interval_seconds: int,
+        session_factory=SessionLocal,
+    ):
+        self._archive = archive
+        self._archive_after = timedelta(days=archive_after_days)
+        self._segment_rows = segment_rows
+        self._interval = interval_seconds
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+        self._archived = metrics.counter(
+            "activity_archive_rows_total", "Activity rows moved to archive segments"
+        )
+        self._segments = metrics.counter(
+            "activity_archive_segments_total", "Archive segments written"
+        )
+
+    def archive_once(self, now: datetime | None = None) -> int:
+        """
+        Archive one segment worth of expired rows. Returns rows moved; 0 if
+        another process is archiving.
+        """
+        with self._archive.exclusive() as acquired:
+            if not acquired:
+                return 0
+            return self._archive_segment(now)
+
+    def _archive_segment(self, now: datetime | None) -> int:
+        cutoff = (now or datetime.now(timezone.utc)) - self._archive_after
+
+        db = self._session_factory()
+        try:
+            activities = (
+                db.query(ActivityLog)
+                .filter(ActivityLog.created_at < cutoff)
+                .order_by(ActivityLog.created_at, ActivityLog.id)
+                .limit(self._segment_rows)
+                .all()
+            )
+            if not activities:
+                return 0
+
+            entry = self._archive.write_segment(activities)
+
+            ids = [a.id for a in activities]
+            for start in range(0, len(ids), 1000):
+                db.execute(
+                    delete(ActivityLog)
+                    .where(ActivityLog.id.in_(ids[start:start + 1000]))
+                    .execution_options(synchronize_session=False)
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._archived.inc(len(activities))
+        self._segments.inc()
+        print(f"🗄️ Archived {entry['rows']} activity logs to {entry['file']}")
+        return len(activities)
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("🟢 Activity archiver started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("🔴 Activity archiver stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                archived = await asyncio.to_thread(self.archive_once)
+            except Exception as e:
+                print("❌ Activity archiving failed:", str(e))
+                archived = 0
+
+            if archived < self._segment_rows:
+                await asyncio.sleep(self._interval)
+
+
+_activity_archive: ActivityArchive | None = None
+
+
+def get_activity_archive() -> ActivityArchive | None:
+    """
+    Shared archive reader/writer, or None when archiving is disabled.
+    """
+    global _activity_archive
+    if not settings.activity_archive_enabled:
+        return None
+    if _activity_archive is None:
+        _activity_archive = ActivityArchive(settings.activity_archive_dir)
+    return _activity_archive
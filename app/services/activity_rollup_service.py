@@ -0,0 +1,169 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.database.models import ActivityLog
+from app.database.models.activity import ActivityType
+from app.repositories.activity_rollup_repository import GRANULARITIES, ActivityRollupRepository
+from app.repositories.watermark_repository import WatermarkRepository
+from app.services.activity_archive import as_utc
+
+
+# Default chart window per granularity when no start is given
+DEFAULT_WINDOWS = {
+    "minute": timedelta(hours=1),
+    "hour": timedelta(days=1),
+    "day": timedelta(days=30),
+}
+
+
+class ActivityRollupService:
+    @staticmethod
+    def get_series(
+        db: Session,
+        *,
+        granularity: str,
+        start: datetime | None,
+        end: datetime | None,
+        activity_type: ActivityType | None,
+        user_id: int | None,
+        group_by: str,
+    ) -> dict:
+        if granularity not in GRANULARITIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"granularity must be one of {', '.join(GRANULARITIES)}",
+            )
+        if group_by not in ("type", "user"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="group_by must be 'type' or 'user'",
+            )
+
+        end = end or datetime.now(timezone.utc)
+        start = start or end - DEFAULT_WINDOWS[granularity]
+
+        return {
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "points": ActivityRollupRepository.series(
+                db,
+                granularity=granularity,
+                start=start,
+                end=end,
+                activity_type=activity_type,
+                user_id=user_id,
+                group_by=group_by,
+            ),
+        }
+
+
+class ActivityRollupJob:
+    """
+    Catch-up aggregation for ``activity_rollup_mode = "catchup"``.
+
+    Reads activity_logs rows with id above a stored watermark in id order,
+    adds them to the rollups and advances the watermark in the same
+    transaction, so each row is counted exactly once. The watermark row is
+    locked for the whole transaction, so the job can run in every worker.
+
+    Ids are assigned at insert but become visible at commit, so while the
+    sink and the writer commit concurrently a lower id can show up after a
+    higher one was counted. The job stops at the first row written less
+    than ``lag_seconds`` ago; ``lag_seconds`` must outlast the longest
+    transaction that inserts activity rows.
+    """
+
+    WATERMARK = "activity_rollups"
+
+    def __init__(
+        self,
+        *,
+        batch_size: int,
+        interval_seconds: int,
+        lag_seconds: int,
+        session_factory=SessionLocal,
+    ):
+        if lag_seconds < 0:
+            raise ValueError("ACTIVITY_ROLLUP_LAG_SECONDS must be >= 0")
+
+        self._batch_size = batch_size
+        self._lag = timedelta(seconds=lag_seconds)
+        self._interval = interval_seconds
+        self._session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    def run_once(self, now: datetime | None = None) -> int:
+        """
+        Aggregate one batch. Returns the number of rows processed.
+        """
+        cutoff = (now or datetime.now(timezone.utc)) - self._lag
+        db = self._session_factory()
+        try:
+            # Held until commit: workers running the job take turns
+            watermark = WatermarkRepository.get_for_update(db, self.WATERMARK)
+            rows = (
+                db.query(
+                    ActivityLog.id,
+                    ActivityLog.activity_type,
+                    ActivityLog.user_id,
+                    ActivityLog.created_at,
+                    # Server time of the insert; created_at is the event time
+                    ActivityLog.updated_at,
+                )
+                .filter(ActivityLog.id > watermark)
+                .order_by(ActivityLog.id)
+                .limit(self._batch_size)
+                .all()
+            )
+            # Rows with lower ids may still be uncommitted behind recent ones
+            settled = next(
+                (i for i, row in enumerate(rows) if as_utc(row.updated_at) >= cutoff),
+                len(rows),
+            )
+            rows = rows[:settled]
+            if not rows:
+                return 0
+
+            ActivityRollupRepository.increment(db, [dict(row._mapping) for row in rows])
+            WatermarkRepository.set(db, self.WATERMARK, rows[-1].id)
+            db.commit()
+            return len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("🟢 Activity rollup job started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("🔴 Activity rollup job stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print("❌ Activity rollup job failed:", str(e))
+                processed = 0
+
+            # Keep going while there is a backlog
+            if processed < self._batch_size:
+                await asyncio.sleep(self._interval)
@@ -1,111 +1,238 @@
-import json
-from app.database import SessionLocal
+import asyncio
+import base64
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.database.models.activity import ActivityType
-from app.repositories.activity_repository import ActivityRepository
 from app.kafka.schemas import BaseEvent
+from app.repositories.activity_repository import AsyncActivityRepository
+from app.repositories.outbox_repository import OutboxRepository
+from app.services.activity_archive import as_utc, get_activity_archive
+from app.services.activity_writer import get_activity_writer_instance
+
+
+# Kafka event_type -> (ActivityType, action) for rows rebuilt from events
+EVENT_ACTIVITY_TYPES: dict[str, tuple[ActivityType, str]] = {
+    "task.created": (ActivityType.TASK_CREATED, "Task created"),
+    "task.updated": (ActivityType.TASK_UPDATED, "Task updated"),
+    "task.deleted": (ActivityType.TASK_DELETED, "Task deleted"),
+    "subtask.created": (ActivityType.SUBTASK_CREATED, "Subtask created"),
+    "subtask.updated": (ActivityType.SUBTASK_UPDATED, "Subtask updated"),
+    "subtask.deleted": (ActivityType.SUBTASK_DELETED, "Subtask deleted"),
+    "profile.updated": (ActivityType.PROFILE_UPDATED, "User profile updated"),
+}
 
 
 class ActivityService:
     @staticmethod
-    async def log_profile_updated(
+    def encode_cursor(created_at: datetime, activity_id: int) -> str:
+        raw = f"{created_at.isoformat()}|{activity_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            created_at, activity_id = raw.rsplit("|", 1)
+            return datetime.fromisoformat(created_at), int(activity_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    @staticmethod
+    async def list_activity(
+        db: AsyncSession,
+        *,
+        user_id: int | None,
+        task_id: int | None,
+        activity_type: ActivityType | None,
+        request_id: str | None,
+        start: datetime | None,
+        end: datetime | None,
+        cursor: str | None,
+        limit: int,
+    ) -> dict:
+        filters = dict(
+            user_id=user_id,
+            task_id=task_id,
+            activity_type=activity_type,
+            request_id=request_id,
+            start=start,
+            end=end,
+            before=ActivityService.decode_cursor(cursor) if cursor else None,
+            # One extra row tells us whether another page exists
+            limit=limit + 1,
+        )
+        rows = await AsyncActivityRepository.list_page(db, **filters)
+
+        # Page runs past the hot rows: continue into archived segments
+        archive = get_activity_archive()
+        if archive and len(rows) <= limit:
+            hot_ids = {row.id for row in rows}
+            # Segment files are read off the event loop
+            archived = await asyncio.to_thread(archive.query, **filters)
+            cold = [row for row in archived if row.id not in hot_ids]
+            rows = sorted(
+                [*rows, *cold],
+                key=lambda row: (as_utc(row.created_at), row.id),
+                reverse=True,
+            )[:limit + 1]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = ActivityService.encode_cursor(last.created_at, last.id)
+
+        return {"items": rows, "next_cursor": next_cursor}
+
+    @staticmethod
+    def activity_row_from_event(event: dict) -> dict:
+        """
+        Build an activity_logs row from a published event.
+        Raises KeyError/ValueError for events that do not map to a row.
+        """
+        activity_type, action = EVENT_ACTIVITY_TYPES[event["event_type"]]
+        resource = event["resource"]
+
+        if activity_type == ActivityType.PROFILE_UPDATED:
+            task_id = None
+            data = event["payload"].get("changes")
+        else:
+            task_id = resource["id"]
+            data = event["payload"]
+
+        return {
+            "user_id": event["actor"]["id"],
+            "task_id": task_id,
+            "activity_type": activity_type,
+            "action": action,
+            "request_id": event["request_id"],
+            "data": data or None,
+            "event_id": event["event_id"],
+            "created_at": datetime.fromisoformat(event["occurred_at"]),
+        }
+
+    @staticmethod
+    def stage_profile_updated(
+        db: Session | AsyncSession,
         *,
         user_id: int,
         request_id: str,
         data: dict | None,
-        kafka_producer,
         topic: str,
         actor: dict,
         meta: dict,
+    ) -> dict:
+        """
+        Add the profile.updated event to the outbox in the caller's
+        transaction. Published to Kafka later by the outbox relay.
+        """
+        event = BaseEvent(
+            event_type="profile.updated",
+            actor=actor,
+            resource={"type": "user", "id": user_id},
+            payload={"changes": data},
+            request_id=request_id,
+            meta=meta,
+        )
+
+        OutboxRepository.add(db, topic=topic, event=event.to_dict())
+        return event.to_dict()
+
+    @staticmethod
+    def stage_task_activity(
+        db: Session | AsyncSession,
+        *,
+        task_id: int,
+        parent_task_id: int | None,
+        root_task_id: int | None,
+        event_type: str,
+        request_id: str,
+        data: dict,
+        topic: str,
+        actor: dict,
+        meta: dict,
+    ) -> dict:
+        """
+        Add a task event to the outbox in the caller's transaction.
+        """
+        event = BaseEvent(
+            event_type=event_type,
+            actor=actor,
+            resource={
+                "type": "task",
+                "id": task_id,
+                "parent_id": parent_task_id,
+                # Partition key for the whole task tree
+                "root_id": root_task_id or task_id,
+            },
+            payload=data,
+            request_id=request_id,
+            meta=meta,
+        )
+
+        OutboxRepository.add(db, topic=topic, event=event.to_dict())
+        return event.to_dict()
+
+    @staticmethod
+    async def log_profile_updated(
+        *,
+        user_id: int,
+        request_id: str,
+        data: dict | None,
+        event: dict | None = None,
     ) -> None:
-        db = SessionLocal()
+        if settings.activity_sink_enabled:
+            # Persisted by ActivitySinkService from the Kafka topic
+            return
+
         try:
-            # Create activity log in DB
-            ActivityRepository.create(
-                db=db,
+            # Queue activity log for the batched DB writer
+            await get_activity_writer_instance().enqueue(
                 user_id=user_id,
                 activity_type=ActivityType.PROFILE_UPDATED,
                 action="User profile updated",
                 request_id=request_id,
-                data=json.dumps(data) if data else None,
-            )
-
-            db.commit()
-
-            # Build event
-            event = BaseEvent(
-                event_type="profile.updated",
-                actor=actor,
-                resource={"type": "user", "id": user_id},
-                payload={"changes": data},
-                request_id=request_id,
-                meta=meta,
-            )
-
-            # Publish to Kafka asynchronously without blocking main thread
-            await kafka_producer.publish(
-                topic=topic,
-                message=event.to_dict(),
+                data=data or None,
+                event_id=event["event_id"] if event else None,
+                created_at=datetime.fromisoformat(event["occurred_at"]) if event else None,
             )
 
         except Exception as e:
-            db.rollback()
             # NEVER crash background thread
             print("❌ Failed to log activity:", str(e))
 
-        finally:
-            db.close()
-
 
     @staticmethod
     async def log_task_activity(
         *,
         user_id: int,
         task_id: int,
-        parent_task_id: int | None,
         activity_type: ActivityType,
         action: str,
-        event_type: str,
         request_id: str,
         data: dict,
-        kafka_producer,
-        topic: str,
-        actor: dict,
-        meta: dict,
+        event: dict | None = None,
     ) -> None:
-        db = SessionLocal()
+        if settings.activity_sink_enabled:
+            return
+
         try:
-            ActivityRepository.create(
-                db=db,
+            await get_activity_writer_instance().enqueue(
                 task_id=task_id,
                 user_id=user_id,
                 activity_type=activity_type,
                 action=action,
                 request_id=request_id,
-                data=json.dumps(data),
-            )
-            db.commit()
-
-            event = BaseEvent(
-                event_type=event_type,
-                actor=actor,
-                resource={
-                    "type": "task",
-                    "id": task_id,
-                    "parent_id": parent_task_id,
-                },
-                payload=data,
-                request_id=request_id,
-                meta=meta,
-            )
-
-            await kafka_producer.publish(
-                topic=topic,
-                message=event.to_dict(),
+                data=data,
+                event_id=event["event_id"] if event else None,
+                created_at=datetime.fromisoformat(event["occurred_at"]) if event else None,
             )
 
         except Exception as e:
-            db.rollback()
             print("❌ Failed to log task activity:", str(e))
-
-        finally:
-            db.close()
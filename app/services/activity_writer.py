@@ -0,0 +1,190 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from app.core.metrics import metrics
+from app.database import SessionLocal
+from app.database.models.activity import ActivityType
+from app.repositories.activity_repository import ActivityRepository
+from app.repositories.activity_rollup_repository import ActivityRollupRepository
+
+
+_STOP = object()
+
+
+class ActivityWriter:
+    """
+    In-process, batching writer for activity logs.
+
+    Events are queued by request handlers and flushed by a single loop as one
+    multi-row INSERT and one COMMIT per batch. A batch is flushed when it
+    reaches ``batch_size`` rows or when ``linger_ms`` has passed since its
+    first row arrived, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        *,
+        batch_size: int,
+        linger_ms: int,
+        max_queue_size: int,
+        maintain_rollups: bool = False,
+        session_factory=SessionLocal,
+    ):
+        self._batch_size = batch_size
+        self._linger = linger_ms / 1000
+        self._maintain_rollups = maintain_rollups
+        self._session_factory = session_factory
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._task: asyncio.Task | None = None
+
+        self._enqueued = metrics.counter(
+            "activity_writer_events_enqueued_total", "Activity events queued for writing"
+        )
+        self._written = metrics.counter(
+            "activity_writer_events_written_total", "Activity rows committed to the database"
+        )
+        self._failed = metrics.counter(
+            "activity_writer_events_failed_total", "Activity rows lost to failed flushes"
+        )
+        self._queue_depth = metrics.gauge(
+            "activity_writer_queue_depth", "Activity events waiting to be flushed"
+        )
+        self._batch_sizes = metrics.histogram(
+            "activity_writer_batch_size",
+            "Rows per flushed batch",
+            buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+        )
+        self._flush_latency = metrics.histogram(
+            "activity_writer_flush_seconds", "Time spent inserting and committing a batch"
+        )
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print("🟢 Activity writer started")
+
+    async def stop(self):
+        """
+        Stop accepting new work and flush everything already queued.
+        """
+        if self._task is None:
+            return
+
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        print("🔴 Activity writer stopped")
+
+    async def enqueue(
+        self,
+        *,
+        user_id: int,
+        activity_type: ActivityType,
+        action: str,
+        request_id: str,
+        data: dict | None = None,
+        task_id: int | None = None,
+        event_id: str | None = None,
+        created_at: datetime | None = None,
+    ) -> None:
+        """
+        Queue one activity row. Waits if the queue is full (backpressure).
+        """
+        await self._queue.put({
+            "user_id": user_id,
+            "task_id": task_id,
+            "activity_type": activity_type,
+            "action": action,
+            "request_id": request_id,
+            "data": data,
+            "event_id": event_id,
+            "created_at": created_at or datetime.now(timezone.utc),
+        })
+        self._enqueued.inc()
+        self._queue_depth.set(self._queue.qsize())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = loop.time() + self._linger
+
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                try:
+                    if timeout > 0:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        item = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._queue_depth.set(self._queue.qsize())
+            await asyncio.to_thread(self._flush, batch)
+
+        # Drain anything queued behind the stop marker
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                remaining.append(item)
+
+        for start in range(0, len(remaining), self._batch_size):
+            await asyncio.to_thread(self._flush, remaining[start:start + self._batch_size])
+
+        self._queue_depth.set(0)
+
+    def _flush(self, batch: list[dict]) -> None:
+        started = time.perf_counter()
+        db = self._session_factory()
+        try:
+            ActivityRepository.bulk_create(db, batch)
+            if self._maintain_rollups:
+                ActivityRollupRepository.increment(db, batch)
+            db.commit()
+            self._written.inc(len(batch))
+            self._batch_sizes.observe(len(batch))
+        except Exception as e:
+            db.rollback()
+            self._failed.inc(len(batch))
+            # NEVER crash the writer loop
+            print(f"❌ Failed to flush {len(batch)} activity logs:", str(e))
+        finally:
+            db.close()
+            self._flush_latency.observe(time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self._enqueued.value,
+            "written": self._written.value,
+            "failed": self._failed.value,
+            "batch_size": self._batch_sizes.snapshot(),
+            "flush_seconds": self._flush_latency.snapshot(),
+        }
+
+
+_activity_writer: ActivityWriter | None = None
+
+
+def set_activity_writer(writer: ActivityWriter) -> None:
+    global _activity_writer
+    _activity_writer = writer
+
+
+def get_activity_writer_instance() -> ActivityWriter:
+    if _activity_writer is None:
+        raise RuntimeError("Activity writer is not initialized")
+    return _activity_writer
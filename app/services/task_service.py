@@ -1,15 +1,15 @@
 from fastapi import BackgroundTasks, HTTPException, status
-from sqlalchemy.orm import Session
-from app.repositories.task_repository import TaskRepository
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.task_repository import AsyncTaskRepository
 from app.schemas.task import TaskUpdate
 from app.services.activity_service import ActivityService
 from app.database.models import User, ActivityType
 
 class TaskService:
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.task_repo = TaskRepository(db)
+        self.task_repo = AsyncTaskRepository(db)
 
     async def create_task(
         self,
@@ -18,12 +18,11 @@ class TaskService:
         payload,
         background_tasks: BackgroundTasks,
         request_id: str,
-        kafka_producer,
         kafka_topic: str,
         meta: dict,
     ):
         if payload.parent_task_id:
-            parent_task = self.task_repo.get_by_id(payload.parent_task_id)
+            parent_task = await self.task_repo.get_by_id(payload.parent_task_id)
             if not parent_task:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -35,11 +34,12 @@ class TaskService:
                     detail="Not allowed to create subtask for this parent task",
                 )
         
-        task = self.task_repo.create(
+        task = await self.task_repo.create(
             user_id=current_user.id,
             title=payload.title,
             description=payload.description,
             parent_task_id=payload.parent_task_id,
+            commit=False,
         )
 
         is_subtask = task.parent_task_id is not None
@@ -53,22 +53,22 @@ class TaskService:
         action = "Subtask created" if is_subtask else "Task created"
         event_type = "subtask.created" if is_subtask else "task.created"
 
-        background_tasks.add_task(
-            ActivityService.log_task_activity,
-            user_id=current_user.id,
+        data = {
+            "id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "parent_task_id": task.parent_task_id,
+        }
+
+        # Task row and its outbox event commit together
+        event = ActivityService.stage_task_activity(
+            self.db,
             task_id=task.id,
             parent_task_id=task.parent_task_id,
-            activity_type=activity_type,
-            action=action,
+            root_task_id=await self.task_repo.get_root_id(task),
             event_type=event_type,
             request_id=request_id,
-            data={
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "parent_task_id": task.parent_task_id,
-            },
-            kafka_producer=kafka_producer,
+            data=data,
             topic=kafka_topic,
             actor={
                 "id": current_user.id,
@@ -77,6 +77,19 @@ class TaskService:
             },
             meta=meta,
         )
+        await self.db.commit()
+        await self.db.refresh(task)
+
+        background_tasks.add_task(
+            ActivityService.log_task_activity,
+            user_id=current_user.id,
+            task_id=task.id,
+            activity_type=activity_type,
+            action=action,
+            request_id=request_id,
+            data=data,
+            event=event,
+        )
 
         return task
 
@@ -88,11 +101,10 @@ class TaskService:
         payload: TaskUpdate,
         background_tasks: BackgroundTasks,
         request_id: str,
-        kafka_producer,
         kafka_topic: str,
         meta: dict,
     ):
-        task = self.task_repo.get_by_id(task_id)
+        task = await self.task_repo.get_by_id(task_id)
 
         if not task:
             raise ValueError("Task not found")
@@ -119,7 +131,7 @@ class TaskService:
         if not changes:
             return task  # nothing changed
 
-        updated_task = self.task_repo.update(task, update_data)
+        updated_task = await self.task_repo.update(task, update_data, commit=False)
 
         is_subtask = updated_task.parent_task_id is not None
 
@@ -132,20 +144,19 @@ class TaskService:
         action = "Subtask updated" if is_subtask else "Task updated"
         event_type = "subtask.updated" if is_subtask else "task.updated"
 
-        background_tasks.add_task(
-            ActivityService.log_task_activity,
-            user_id=current_user.id,
+        data = {
+            "id": updated_task.id,
+            "changes": changes,
+        }
+
+        event = ActivityService.stage_task_activity(
+            self.db,
             task_id=updated_task.id,
             parent_task_id=updated_task.parent_task_id,
-            activity_type=activity_type,
-            action=action,
+            root_task_id=await self.task_repo.get_root_id(updated_task),
             event_type=event_type,
             request_id=request_id,
-            data={
-                "id": updated_task.id,
-                "changes": changes,
-            },
-            kafka_producer=kafka_producer,
+            data=data,
             topic=kafka_topic,
             actor={
                 "id": current_user.id,
@@ -154,6 +165,19 @@ class TaskService:
             },
             meta=meta,
         )
+        await self.db.commit()
+        await self.db.refresh(updated_task)
+
+        background_tasks.add_task(
+            ActivityService.log_task_activity,
+            user_id=current_user.id,
+            task_id=updated_task.id,
+            activity_type=activity_type,
+            action=action,
+            request_id=request_id,
+            data=data,
+            event=event,
+        )
 
         return updated_task
 
@@ -165,11 +189,10 @@ class TaskService:
         current_user: User,
         background_tasks: BackgroundTasks,
         request_id: str,
-        kafka_producer,
         kafka_topic: str,
         meta: dict,
     ):
-        task = self.task_repo.get_by_id(task_id)
+        task = await self.task_repo.get_by_id(task_id)
 
         if not task:
             raise HTTPException(
@@ -183,7 +206,7 @@ class TaskService:
                 detail="Not allowed to delete this task",
             )
         
-        self.task_repo.delete(task)
+        await self.task_repo.delete(task, commit=False)
 
         is_subtask = task.parent_task_id is not None
 
@@ -196,22 +219,21 @@ class TaskService:
         action = "Subtask deleted" if is_subtask else "Task deleted"
         event_type = "subtask.deleted" if is_subtask else "task.deleted"
 
-        background_tasks.add_task(
-            ActivityService.log_task_activity,
-            user_id=current_user.id,
+        data = {
+            "id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "parent_task_id": task.parent_task_id,
+        }
+
+        event = ActivityService.stage_task_activity(
+            self.db,
             task_id=task.id,
             parent_task_id=task.parent_task_id,
-            activity_type=activity_type,
-            action=action,
+            root_task_id=await self.task_repo.get_root_id(task),
             event_type=event_type,
             request_id=request_id,
-            data={
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "parent_task_id": task.parent_task_id,
-            },
-            kafka_producer=kafka_producer,
+            data=data,
             topic=kafka_topic,
             actor={
                 "id": current_user.id,
@@ -220,6 +242,18 @@ class TaskService:
             },
             meta=meta,
         )
+        await self.db.commit()
+
+        background_tasks.add_task(
+            ActivityService.log_task_activity,
+            user_id=current_user.id,
+            task_id=task.id,
+            activity_type=activity_type,
+            action=action,
+            request_id=request_id,
+            data=data,
+            event=event,
+        )
 
         return
     
\ No newline at end of file
@@ -1,8 +1,8 @@
 import json
 from fastapi import BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.repositories.user_repository import UserRepository
+from app.repositories.user_repository import AsyncUserRepository
 from app.services.activity_service import ActivityService
 from app.schemas.user import UserProfileUpdate
 from app.database.models import User
@@ -10,9 +10,9 @@ from app.database.models import User
 
 class UserService:
 
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
-        self.user_repo = UserRepository(db)
+        self.user_repo = AsyncUserRepository(db)
         
 
     async def update_profile(
@@ -22,7 +22,6 @@ class UserService:
         payload: UserProfileUpdate,
         background_tasks: BackgroundTasks,
         request_id: str,
-        kafka_producer,
         kafka_topic: str,
         meta: dict,
     ) -> User:
@@ -32,15 +31,14 @@ class UserService:
         for field, value in update_data.items():
             setattr(current_user, field, value)
 
-        updated_user = self.user_repo.update(current_user)
+        updated_user = await self.user_repo.update(current_user, commit=False)
 
-        # Add activity log in background
-        background_tasks.add_task(
-            ActivityService.log_profile_updated,
+        # Profile change and its outbox event commit together
+        event = ActivityService.stage_profile_updated(
+            self.db,
             user_id=current_user.id,
             request_id=request_id,
             data=update_data,
-            kafka_producer=kafka_producer,
             topic=kafka_topic,
             actor={
                 "id": current_user.id,
@@ -49,5 +47,16 @@ class UserService:
             },
             meta=meta,
         )
+        await self.db.commit()
+        await self.db.refresh(updated_user)
+
+        # Add activity log in background
+        background_tasks.add_task(
+            ActivityService.log_profile_updated,
+            user_id=current_user.id,
+            request_id=request_id,
+            data=update_data,
+            event=event,
+        )
 
         return updated_user
@@ -15,19 +15,84 @@ document.addEventListener("DOMContentLoaded", () => {
   const protocol = location.protocol === "https:" ? "wss" : "ws";
   const wsUrl = `${protocol}://${location.host}${window.ADMIN_WS_URL}?token=${token}`;
 
-  const socket = new WebSocket(wsUrl);
-
-  socket.onopen = () => console.log("🟢 Admin WebSocket connected");
-
-  socket.onmessage = (message) => {
-    try {
-      const data = JSON.parse(message.data);
-      const activityEvent = data.event ?? data.value ?? data; // safe extraction
-      renderActivity(activityEvent);
-    } catch (err) {
-      console.error("Invalid WS message:", err);
-    }
-  };
+  // Position in the server's stream, used to resume after a reconnect
+  let streamId = null;
+  let lastSeq = null;
+
+  // Reconnect delay doubles per failed attempt, reset once connected
+  const RECONNECT_MIN_MS = 1000;
+  const RECONNECT_MAX_MS = 30000;
+  let reconnectDelay = RECONNECT_MIN_MS;
+
+  function connect() {
+    const resume =
+      streamId !== null && lastSeq !== null
+        ? `&stream=${streamId}&last_seq=${lastSeq}`
+        : "";
+    const socket = new WebSocket(wsUrl + resume);
+
+    socket.onopen = () => {
+      console.log("🟢 Admin WebSocket connected");
+      reconnectDelay = RECONNECT_MIN_MS;
+      // Only receive the event types this dashboard can render
+      socket.send(
+        JSON.stringify({ type: "subscribe", event_types: Object.keys(EVENT_LABELS) })
+      );
+    };
+
+    socket.onmessage = (message) => {
+      try {
+        const data = JSON.parse(message.data);
+        // Coalesced frames carry an array of messages, oldest first
+        const items = Array.isArray(data) ? data : [data];
+
+        for (const item of items) {
+          if (item.type === "hello" || item.type === "resync") {
+            if (item.type === "resync") {
+              console.warn(`⚠️ Activity feed gap (${item.reason}); reload to see missed events`);
+            }
+            if (item.type === "resync" || item.stream !== streamId) {
+              streamId = item.stream;
+              lastSeq = item.seq;
+            }
+          } else if (typeof item.seq === "number") {
+            lastSeq = item.seq;
+          }
+        }
+
+        // One DOM insert per frame, newest row on top
+        const fragment = document.createDocumentFragment();
+        for (const item of items.reverse()) {
+          if (item.type === "summary") {
+            console.warn(`⚠️ ${item.dropped} activity events skipped (rate limit)`);
+            continue;
+          }
+          const activityEvent = item.event ?? item.value ?? item; // safe extraction
+          const rows = renderActivity(activityEvent);
+          if (rows) fragment.append(...rows);
+        }
+        tableBody.prepend(fragment);
+      } catch (err) {
+        console.error("Invalid WS message:", err);
+      }
+    };
+
+    socket.onclose = (event) => {
+      // 1008: policy violation, e.g. expired or invalid token; retrying
+      // with the same token cannot succeed
+      if (event.code === 1008) {
+        console.error(`🔴 Admin WebSocket rejected (${event.reason || "policy"})`);
+        alert("Admin session expired or not authorized. Please login again.");
+        return;
+      }
+
+      // Jitter so many dashboards do not reconnect in lockstep
+      const delay = reconnectDelay / 2 + Math.random() * (reconnectDelay / 2);
+      console.log(`🔴 Admin WebSocket closed (${event.code}), reconnecting in ${Math.round(delay)}ms`);
+      setTimeout(connect, delay);
+      reconnectDelay = Math.min(reconnectDelay * 2, RECONNECT_MAX_MS);
+    };
+  }
 
   const EVENT_LABELS = {
     "profile.updated": {
@@ -61,12 +126,12 @@ document.addEventListener("DOMContentLoaded", () => {
   };
 
   function renderActivity(event) {
-    if (!event || !event.event_type) return;
+    if (!event || !event.event_type) return null;
 
     const config = EVENT_LABELS[event.event_type];
 
     // Skip unknown events safely
-    if (!config) return;
+    if (!config) return null;
 
     const rowId = `details-${event.event_id}`;
     const changes =
@@ -115,9 +180,9 @@ document.addEventListener("DOMContentLoaded", () => {
       </td>
     `;
 
-    tableBody.prepend(detailsTr);
-    tableBody.prepend(tr);
+    return [tr, detailsTr];
   }
 
 
+  connect();
 });
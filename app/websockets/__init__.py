@@ -1 +1 @@
-from .manager import admin_ws_manager
\ No newline at end of file
+from .manager import StreamEvent, admin_ws_manager
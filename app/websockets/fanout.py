@@ -0,0 +1,288 @@
+import asyncio
+import os
+import struct
+
+try:
+    import fcntl
+except ImportError:  # Windows: hub mode unavailable
+    fcntl = None
+
+from aiokafka import ConsumerRecord
+
+from app.core.codecs import EventCodec, JsonCodec, codec_from_headers, get_codec
+from app.core.metrics import metrics
+from app.kafka.consumer import KafkaConsumerService
+from app.websockets.manager import AdminWebSocketManager, StreamEvent, admin_ws_manager
+
+
+_BATCH = struct.Struct(">I")
+# stream id length, stream seq before the batch
+_STREAM = struct.Struct(">Bq")
+# topic length, codec name length, partition, offset, seq, timestamp, raw
+# event length
+_EVENT = struct.Struct(">HHiqqqI")
+
+
+def encode_batch(stream_id: str, seq: int, events: list[StreamEvent]) -> bytes:
+    """
+    One length-prefixed IPC frame: the leader's stream id and seq before
+    the batch, then (topic, codec name, partition, offset, seq, timestamp,
+    raw event) entries. A missing partition / offset / seq / timestamp is
+    sent as -1.
+    """
+    stream_bytes = stream_id.encode("utf-8")
+    body = bytearray(_STREAM.pack(len(stream_bytes), seq) + stream_bytes)
+    for event in events:
+        topic_bytes = event.topic.encode("utf-8")
+        codec_bytes = event.codec.name.encode("utf-8")
+        body += _EVENT.pack(
+            len(topic_bytes),
+            len(codec_bytes),
+            -1 if event.partition is None else event.partition,
+            -1 if event.offset is None else event.offset,
+            -1 if event.seq is None else event.seq,
+            -1 if event.timestamp is None else event.timestamp,
+            len(event.raw_event),
+        )
+        body += topic_bytes + codec_bytes + event.raw_event
+    return _BATCH.pack(len(body)) + bytes(body)
+
+
+def decode_batch(body: bytes) -> tuple[str, int, list[StreamEvent]]:
+    stream_len, stream_seq = _STREAM.unpack_from(body)
+    position = _STREAM.size
+    stream_id = body[position:position + stream_len].decode("utf-8")
+    position += stream_len
+
+    events = []
+    while position < len(body):
+        topic_len, codec_len, partition, offset, seq, timestamp, raw_len = _EVENT.unpack_from(
+            body, position
+        )
+        position += _EVENT.size
+        topic = body[position:position + topic_len].decode("utf-8")
+        position += topic_len
+        codec = get_codec(body[position:position + codec_len].decode("utf-8"))
+        position += codec_len
+        events.append(StreamEvent(
+            topic,
+            None if partition < 0 else partition,
+            None if offset < 0 else offset,
+            body[position:position + raw_len],
+            codec,
+            None if seq < 0 else seq,
+            None if timestamp < 0 else timestamp,
+        ))
+        position += raw_len
+    return stream_id, stream_seq, events
+
+
+class ActivityStreamHub:
+    """
+    Per-host fan-out of the admin activity stream across uvicorn workers.
+
+    Every worker runs one hub. The worker that wins a non-blocking
+    ``flock`` on ``lock_path`` becomes the leader: it runs the Kafka
+    consumer (one broker read per host) and serves consumed batches over a
+    Unix socket. The other workers connect to that socket and broadcast what
+    they receive to their own admin sockets. If the leader dies its lock is
+    released by the OS, followers see EOF, and one of them takes over.
+
+    The leader stamps every event with its manager's seq before forwarding,
+    and followers join the leader's stream (id and seq), so a client can
+    resume with ``last_seq`` on any worker of the host. A new leader keeps
+    the stream it followed.
+
+    The consumer must use a group id unique to the host so each host reads
+    every partition.
+    """
+
+    RETRY_SECONDS = 0.5
+
+    def __init__(
+        self,
+        *,
+        consumer: KafkaConsumerService,
+        socket_path: str,
+        lock_path: str,
+        max_buffer_bytes: int,
+        codec: EventCodec | None = None,
+        manager: AdminWebSocketManager = admin_ws_manager,
+    ):
+        if fcntl is None:
+            raise RuntimeError("Activity stream hub mode requires fcntl (POSIX)")
+
+        self._consumer = consumer
+        self._socket_path = socket_path
+        self._lock_path = lock_path
+        self._max_buffer = max_buffer_bytes
+        self._codec = codec or JsonCodec()
+        self._manager = manager
+        self._lock_fd: int | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._followers: set[asyncio.StreamWriter] = set()
+        self.is_leader = False
+
+        self._forwarded = metrics.counter(
+            "activity_stream_hub_events_forwarded_total", "Events forwarded to follower workers"
+        )
+        self._evicted = metrics.counter(
+            "activity_stream_hub_followers_evicted_total", "Followers dropped for falling behind"
+        )
+        self._follower_count = metrics.gauge(
+            "activity_stream_hub_followers", "Workers subscribed to this host's leader"
+        )
+
+    @property
+    def follower_count(self) -> int:
+        return len(self._followers)
+
+    # Leader election
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    async def run(self):
+        while True:
+            if self._try_lock():
+                await self._lead()
+                return
+
+            try:
+                await self._follow()
+            except (ConnectionError, FileNotFoundError):
+                pass
+            # Leader gone or not up yet: try to take over / reconnect
+            await asyncio.sleep(self.RETRY_SECONDS)
+
+    # Leader
+
+    async def _lead(self):
+        self.is_leader = True
+        if os.path.exists(self._socket_path):
+            # Stale socket from a dead leader; we hold the lock now
+            os.unlink(self._socket_path)
+        self._server = await asyncio.start_unix_server(self._accept, path=self._socket_path)
+        print(f"👑 Activity stream leader (pid={os.getpid()}) on {self._socket_path}")
+
+        # Stamp once, then broadcast locally and forward the same events
+        self._consumer.remove_handler(self._consumer.broadcast_batch)
+        self._consumer.add_handler(self.forward_batch)
+        await self._consumer.start()
+        # Kafka disabled: keep serving (e.g. forwarded test events)
+        await self._server.serve_forever()
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Empty batch: the follower joins the stream before any event
+        writer.write(encode_batch(self._manager.stream_id, self._manager.seq, []))
+        self._followers.add(writer)
+        self._follower_count.set(len(self._followers))
+        try:
+            # Followers never send; EOF means they went away
+            await reader.read()
+        finally:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter):
+        if writer in self._followers:
+            self._followers.discard(writer)
+            self._follower_count.set(len(self._followers))
+            writer.close()
+
+    async def forward_batch(self, records: list[ConsumerRecord]) -> None:
+        """
+        Consumer handler on the leader: stamp the batch, send it to every
+        follower and broadcast it to this worker's admin sockets. Local and
+        forwarded delivery happen in one handler that does not fail part
+        way, so a rewound batch is never sent to some sockets twice.
+        """
+        events = []
+        for record in records:
+            try:
+                events.append(StreamEvent(
+                    record.topic,
+                    record.partition,
+                    record.offset,
+                    record.value,
+                    codec_from_headers(record.headers, self._codec),
+                    timestamp=record.timestamp,
+                ))
+            except ValueError as e:
+                print("⚠️ Skipping undecodable message:", repr(e))
+                continue
+
+        seq = self._manager.seq
+        events = self._manager.stamp(events)
+        self.forward(events, seq)
+        await self._manager.broadcast_raw_many(events)
+
+    def forward(self, events: list[StreamEvent], seq: int | None = None) -> None:
+        """
+        Send events to every follower; ``seq`` is the stream's seq before
+        them (the manager's current seq for unstamped events).
+        """
+        if not events or not self._followers:
+            return
+
+        frame = encode_batch(
+            self._manager.stream_id,
+            self._manager.seq if seq is None else seq,
+            events,
+        )
+        for writer in list(self._followers):
+            # Never await a follower; one that cannot keep up is dropped
+            if writer.transport.get_write_buffer_size() > self._max_buffer:
+                print("🧹 Dropping slow activity stream follower")
+                self._evicted.inc()
+                self._drop(writer)
+                continue
+            try:
+                writer.write(frame)
+            except Exception as e:
+                # A broken follower must not fail (and rewind) the batch
+                print("⚠️ Dropping activity stream follower:", repr(e))
+                self._drop(writer)
+        self._forwarded.inc(len(events))
+
+    # Follower
+
+    async def _follow(self):
+        reader, writer = await asyncio.open_unix_connection(self._socket_path)
+        print(f"🔗 Activity stream follower (pid={os.getpid()}) connected")
+        try:
+            while True:
+                header = await reader.readexactly(_BATCH.size)
+                (length,) = _BATCH.unpack(header)
+                body = await reader.readexactly(length)
+                try:
+                    stream_id, seq, events = decode_batch(body)
+                except ValueError as e:
+                    print("⚠️ Skipping undecodable activity stream batch:", repr(e))
+                    continue
+                await self._manager.join_stream(stream_id, seq)
+                if events:
+                    await self._manager.broadcast_raw_many(events)
+        except asyncio.IncompleteReadError:
+            print("⚠️ Activity stream leader went away")
+        finally:
+            writer.close()
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            for writer in list(self._followers):
+                self._drop(writer)
+            self._server = None
+            if os.path.exists(self._socket_path):
+                os.unlink(self._socket_path)
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
@@ -1,39 +1,657 @@
+import asyncio
+import time
+from collections import deque
+from typing import NamedTuple
+from uuid import uuid4
+
 from fastapi import WebSocket
+from pydantic import ValidationError
+
+from app.core.codecs import EventCodec, JsonCodec
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.schemas.activity import ActivitySubscription
+from app.websockets.subscriptions import FILTER_FIELDS, SubscriptionIndex, event_filter_keys
+
+
+class StreamEvent(NamedTuple):
+    """
+    One activity event as it came off Kafka. ``partition`` / ``offset`` are
+    None for events that did not come from the topic; ``seq`` is stamped by
+    the manager when the event is broadcast (by the leader's manager in hub
+    mode). ``timestamp`` is the Kafka record timestamp in ms, if any.
+    """
+
+    topic: str
+    partition: int | None
+    offset: int | None
+    raw_event: bytes
+    codec: EventCodec
+    seq: int | None = None
+    timestamp: int | None = None
+
+
+class ReplayOverflow(Exception):
+    """
+    A replaying socket buffered more live events than allowed.
+    """
+
+
+class _SocketRateLimit:
+    """
+    Fixed one-second window of events sent to one socket.
+    """
+
+    def __init__(self, max_per_second: int):
+        self.max_per_second = max_per_second
+        self.window_started = time.monotonic()
+        self.sent = 0
+        self.dropped = 0
+
+    def roll(self, now: float) -> int:
+        """
+        Start a new window if the current one is over. Returns the number
+        of events dropped in the finished window.
+        """
+        if now - self.window_started < 1:
+            return 0
+        dropped = self.dropped
+        self.window_started = now
+        self.sent = 0
+        self.dropped = 0
+        return dropped
+
+    def admit(self) -> bool:
+        if self.sent < self.max_per_second:
+            self.sent += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def until_window_end(self, now: float) -> float:
+        return max(0.0, 1 - (now - self.window_started))
 
 
 class AdminWebSocketManager:
-    def __init__(self):
+    """
+    Admin sockets receiving the activity stream.
+
+    Every live socket has a bounded outbound queue drained by its own writer
+    task; broadcasting only encodes and enqueues, so it never waits on a
+    client. A socket whose queue overflows or whose send takes longer than
+    ``send_timeout_ms`` is evicted (closed with 1013), so one stalled
+    browser cannot hold up the others or the Kafka consumer.
+
+    Every broadcast event gets the next sequence number of this manager's
+    stream (``stream_id``, new per process unless it joins the hub leader's
+    stream) and is kept in a ring buffer of the last ``resume_buffer_size``
+    events, so a client reconnecting with ``last_seq`` gets the missed tail
+    from memory.
+
+    Writers optionally coalesce what is queued within ``coalesce_ms`` into
+    one array frame, and cap each socket at ``max_events_per_second``:
+    events over the cap are dropped and replaced by one ``summary`` message
+    per window.
+    """
+
+    def __init__(
+        self,
+        max_replay_buffer: int = 10000,
+        send_queue_size: int = 1000,
+        send_timeout_ms: int = 5000,
+        coalesce_ms: int = 0,
+        coalesce_max_events: int = 100,
+        max_events_per_second: int = 0,
+        resume_buffer_size: int = 10000,
+    ):
         self.active: set[WebSocket] = set()
+        # Codec negotiated per socket (WebSocket subprotocol)
+        self.codecs: dict[WebSocket, EventCodec] = {}
+        # Per-socket event filters (subscribe messages)
+        self.subscriptions = SubscriptionIndex()
+        # Outbound (frame, enqueued_at, is_event, kafka timestamp ms) per
+        # live socket, and its writer
+        self.queues: dict[WebSocket, asyncio.Queue] = {}
+        self._writers: dict[WebSocket, asyncio.Task] = {}
+        self.send_queue_size = send_queue_size
+        self._send_timeout = send_timeout_ms / 1000
+        self._coalesce_window = coalesce_ms / 1000
+        self._coalesce_max = coalesce_max_events
+        self.max_events_per_second = max_events_per_second
+        self.stream_id = uuid4().hex[:12]
+        self.seq = 0
+        self._history: deque[StreamEvent] = deque(maxlen=resume_buffer_size)
+        # Sockets still replaying history: live events are held back here
+        # until the replay has caught up
+        self.replaying: dict[WebSocket, list[StreamEvent]] = {}
+        # Sockets live after a replay -> {partition: end offset the replay
+        # covered}; a lagging live consumer still delivers offsets below it
+        self._replayed_to: dict[WebSocket, dict[int, int]] = {}
+        self._overflowed: set[WebSocket] = set()
+        self.max_replay_buffer = max_replay_buffer
+        self._default_codec = JsonCodec()
+        self.send_latency = metrics.histogram(
+            "admin_ws_send_seconds", "Time to send one frame to one admin socket"
+        )
+        self.delivery_latency = metrics.histogram(
+            "activity_stream_delivery_seconds",
+            "Kafka record timestamp to sent on an admin socket",
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+        )
+        self._queue_wait = metrics.histogram(
+            "admin_ws_queue_wait_seconds", "Time a frame waits in a socket's send queue"
+        )
+        self._coalesced = metrics.histogram(
+            "admin_ws_frame_events",
+            "Messages per coalesced WebSocket frame",
+            buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+        )
+        self._rate_limited = metrics.counter(
+            "admin_ws_rate_limited_total", "Events dropped by the per-socket rate limit"
+        )
 
-    async def connect(self, ws: WebSocket):
-        self.active.add(ws)
+    async def connect(self, ws: WebSocket, codec: EventCodec | None = None, *, replay: bool = False):
+        self.codecs[ws] = codec or self._default_codec
+        self.subscriptions.add(ws)
+        # Compression is negotiated by the server (uvicorn
+        # --ws-per-message-deflate); track how many clients offer it
+        offered = "permessage-deflate" in ws.headers.get("sec-websocket-extensions", "")
+        metrics.counter(
+            "admin_ws_connections_total",
+            "Admin sockets connected",
+            permessage_deflate=str(offered).lower(),
+        ).inc()
+        hello = {"type": "hello", "stream": self.stream_id, "seq": self.seq}
+        if replay:
+            self.replaying[ws] = []
+            print(f"⏪ Admin WS connected, replaying | total={len(self.active) + len(self.replaying)}")
+            await self.send(ws, self.message_frame(ws, hello))
+            return
+        self._activate(ws)
         print(f"🟢 Admin WS connected | total={len(self.active)}")
+        await self.send_control(ws, hello)
 
     def disconnect(self, ws: WebSocket):
-        self.active.discard(ws)
+        """
+        Forget a socket. Safe to call more than once, or for a socket that
+        never connected.
+        """
+        if ws not in self.codecs:
+            return
+        self._remove(ws)
         print(f"🔴 Admin WS disconnected | total={len(self.active)}")
 
-    async def broadcast(self, message: dict):
-        print(f"📡 Broadcasting to {len(self.active)} admin sockets")
+    def _activate(self, ws: WebSocket) -> None:
+        queue = asyncio.Queue(maxsize=self.send_queue_size)
+        self.queues[ws] = queue
+        self._writers[ws] = asyncio.create_task(self._write(ws, queue))
+        self.active.add(ws)
 
-        if not self.active:
-            print("⚠️ No active admin WS connections")
+    def _remove(self, ws: WebSocket) -> None:
+        self.active.discard(ws)
+        self.replaying.pop(ws, None)
+        self._replayed_to.pop(ws, None)
+        self._overflowed.discard(ws)
+        self.codecs.pop(ws, None)
+        self.subscriptions.remove(ws)
+        self.queues.pop(ws, None)
+        writer = self._writers.pop(ws, None)
+        if writer is not None and writer is not asyncio.current_task():
+            writer.cancel()
+
+    def evict(self, ws: WebSocket, reason: str) -> None:
+        """
+        Drop a socket that cannot keep up and close it in the background.
+        """
+        if ws not in self.codecs:
             return
+        self._remove(ws)
+        metrics.counter(
+            "admin_ws_evicted_total", "Admin sockets dropped for falling behind", reason=reason
+        ).inc()
+        print(f"🧹 Evicted slow admin WS ({reason}) | total={len(self.active)}")
+        asyncio.create_task(self._close(ws))
+
+    async def _close(self, ws: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=1013, reason="too slow"), self._send_timeout)
+        except Exception:
+            pass
+
+    async def _write(self, ws: WebSocket, queue: asyncio.Queue) -> None:
+        limit = _SocketRateLimit(self.max_events_per_second) if self.max_events_per_second else None
+
+        while True:
+            # A pending summary is sent when its window ends, even if idle
+            timeout = limit.until_window_end(time.monotonic()) if limit and limit.dropped else None
+            items = await self._next_items(queue, timeout)
+
+            frames = []
+            if limit:
+                dropped = limit.roll(time.monotonic())
+                if dropped:
+                    frames.append(self.message_frame(ws, {
+                        "type": "summary",
+                        "dropped": dropped,
+                        "max_events_per_second": limit.max_per_second,
+                    }))
 
-        dead = []
+            now = time.perf_counter()
+            produced = []
+            for frame, enqueued_at, is_event, timestamp in items:
+                self._queue_wait.observe(now - enqueued_at)
+                if is_event and limit and not limit.admit():
+                    self._rate_limited.inc()
+                    continue
+                frames.append(frame)
+                if timestamp:
+                    produced.append(timestamp)
+
+            if not frames:
+                continue
+            if self._coalesce_window:
+                self._coalesced.observe(len(frames))
+                if len(frames) > 1:
+                    frames = [self._coalesce(self.codec_for(ws), frames)]
 
-        for ws in self.active:
             try:
-                print("➡️ Sending event to admin WS")
-                await ws.send_json(message)
+                for frame in frames:
+                    await self.send(ws, frame)
+            except asyncio.TimeoutError:
+                self.evict(ws, "send_timeout")
+                return
             except Exception as e:
                 print("❌ WS send failed:", repr(e))
-                dead.append(ws)
+                self.evict(ws, "send_failed")
+                return
+
+            # End-of-pipeline latency: producer timestamp to sent
+            now_ms = time.time() * 1000
+            for timestamp in produced:
+                self.delivery_latency.observe(max(0.0, now_ms - timestamp) / 1000)
+
+    async def _next_items(self, queue: asyncio.Queue, timeout: float | None) -> list[tuple]:
+        """
+        Next queued item, plus whatever else arrives within the coalescing
+        window. Empty if ``timeout`` passes first.
+        """
+        try:
+            items = [await asyncio.wait_for(queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+
+        if self._coalesce_window:
+            await asyncio.sleep(self._coalesce_window)
+            while len(items) < self._coalesce_max and not queue.empty():
+                items.append(queue.get_nowait())
+        return items
+
+    def _coalesce(self, codec: EventCodec, frames: list[bytes | str]) -> bytes | str:
+        if codec.binary:
+            return codec.array(frames)
+        return codec.array([frame.encode("utf-8") for frame in frames]).decode("utf-8")
+
+    def codec_for(self, ws: WebSocket) -> EventCodec:
+        return self.codecs.get(ws, self._default_codec)
+
+    async def go_live(
+        self,
+        ws: WebSocket,
+        replayed_to: dict[int, int] | None = None,
+        *,
+        through_seq: int = 0,
+    ):
+        """
+        Finish a replay: send the live events held back while it ran, minus
+        those the replay already covered (offset below ``replayed_to`` for
+        their partition, or seq up to ``through_seq``), then switch the
+        socket to the live stream. Live events below ``replayed_to`` keep
+        being dropped for the socket until its partition passes the offset.
+        """
+        replayed_to = dict(replayed_to or {})
+        while True:
+            self.check_replay(ws)
+            held = self.replaying[ws]
+            if not held:
+                # No await between the check and the switch: nothing can
+                # slip in between
+                del self.replaying[ws]
+                if replayed_to:
+                    self._replayed_to[ws] = replayed_to
+                self._activate(ws)
+                print(f"🟢 Admin WS live after replay | total={len(self.active)}")
+                return
+
+            self.replaying[ws] = []
+            for event in held:
+                if self._replayed_already(replayed_to, event):
+                    continue
+                if event.seq is not None and event.seq <= through_seq:
+                    continue
+                try:
+                    if not self.wants(ws, event):
+                        continue
+                    await self.send(ws, self.event_frame(ws, event))
+                except ValueError as e:
+                    print("⚠️ Skipping undecodable message:", repr(e))
+
+    async def abort(self, ws: WebSocket, reason: str) -> None:
+        """
+        Give up on a replaying socket: drop it and close it with 1013 (try
+        again later).
+        """
+        self.disconnect(ws)
+        try:
+            await ws.close(code=1013, reason=reason)
+        except Exception:
+            pass
+
+    async def resume(self, ws: WebSocket, stream_id: str | None, last_seq: int) -> None:
+        """
+        Send a socket connected with ``replay=True`` the events after
+        ``last_seq`` from the ring buffer, then switch it to live. If the
+        stream changed (server restart, other worker outside hub mode) or
+        the gap is no longer buffered, send ``resync`` instead: the client
+        must reload from the activity API.
+        """
+        try:
+            await self._resume(ws, stream_id, last_seq)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("❌ Admin WS resume failed:", repr(e))
+            await self.abort(ws, "resume failed")
 
-        for ws in dead:
-            self.active.discard(ws)
-            print(f"🧹 Removed dead WS | total={len(self.active)}")
+    async def _resume(self, ws: WebSocket, stream_id: str | None, last_seq: int) -> None:
+        # Snapshot without awaiting: anything newer is held back for go_live
+        through_seq = self.seq
+        oldest = self._history[0].seq if self._history else through_seq + 1
+
+        if stream_id != self.stream_id or last_seq > through_seq:
+            reason = "stream_changed"
+        elif last_seq + 1 < oldest:
+            reason = "gap_too_old"
+        else:
+            reason = None
+
+        if reason:
+            metrics.counter("admin_ws_resumes_total", "Admin socket resume attempts", outcome="resync").inc()
+            await self.send(ws, self.message_frame(ws, {
+                "type": "resync",
+                "reason": reason,
+                "stream": self.stream_id,
+                "seq": through_seq,
+            }))
+            await self.go_live(ws, through_seq=through_seq)
+            return
+
+        tail = [event for event in self._history if last_seq < event.seq <= through_seq]
+        metrics.counter("admin_ws_resumes_total", "Admin socket resume attempts", outcome="resumed").inc()
+        for event in tail:
+            try:
+                if self.wants(ws, event):
+                    await self.send(ws, self.event_frame(ws, event))
+            except ValueError as e:
+                print("⚠️ Skipping undecodable message:", repr(e))
+        print(f"⏩ Resumed admin WS from seq {last_seq}: {len(tail)} events from memory")
+        await self.go_live(ws, through_seq=through_seq)
+
+    async def handle_message(self, ws: WebSocket, data: str | bytes) -> None:
+        """
+        Client -> server message. Text frames are JSON, binary frames use
+        the socket's codec. Only ``subscribe`` is understood; anything else
+        (e.g. keep-alive pings) is ignored.
+        """
+        codec = self._default_codec if isinstance(data, str) else self.codec_for(ws)
+        try:
+            message = codec.decode(data)
+        except ValueError:
+            return
+        if not isinstance(message, dict) or message.get("type") != "subscribe":
+            return
+
+        try:
+            subscription = ActivitySubscription.model_validate(message)
+        except ValidationError as e:
+            await self.send_control(ws, {"type": "error", "detail": e.errors(include_url=False, include_context=False)})
+            return
+
+        filters = {field: getattr(subscription, field) for field in FILTER_FIELDS}
+        self.subscriptions.subscribe(ws, filters)
+        print(f"🔎 Admin WS subscribed | {filters}")
+        await self.send_control(ws, {"type": "subscribed", **filters})
+
+    async def send_control(self, ws: WebSocket, message: dict) -> None:
+        """
+        Server message to one socket, in order with the events it gets.
+        """
+        frame = self.message_frame(ws, message)
+        queue = self.queues.get(ws)
+        if queue is None:
+            # Replaying: the replay task is the only other sender
+            await self.send(ws, frame)
+            return
+        try:
+            queue.put_nowait((frame, time.perf_counter(), False, None))
+        except asyncio.QueueFull:
+            self.evict(ws, "queue_full")
+
+    def wants(self, ws: WebSocket, event: StreamEvent) -> bool:
+        """
+        Whether the socket's subscription matches the event. Raises
+        ValueError if the event cannot be decoded.
+        """
+        if not self.subscriptions.is_filtered(ws):
+            return True
+        return self.subscriptions.matches(ws, event_filter_keys(event.codec.decode(event.raw_event)))
+
+    def event_frame(self, ws: WebSocket, event: StreamEvent) -> bytes | str:
+        return self._raw_frames(event.topic, event.raw_event, event.codec, seq=event.seq)(self.codec_for(ws))
+
+    def message_frame(self, ws: WebSocket, message: dict) -> bytes | str:
+        codec = self.codec_for(ws)
+        return self._as_frame(codec, codec.encode(message))
+
+    def check_replay(self, ws: WebSocket) -> None:
+        """
+        Raise ``ReplayOverflow`` if live events outran the socket's replay.
+        """
+        if ws in self._overflowed:
+            self._overflowed.discard(ws)
+            raise ReplayOverflow(f"more than {self.max_replay_buffer} live events held back")
+
+    async def send(self, ws: WebSocket, frame: bytes | str):
+        """
+        Send one frame now, bounded by the send deadline (raises
+        ``asyncio.TimeoutError``).
+        """
+        started = time.perf_counter()
+        if isinstance(frame, bytes):
+            await asyncio.wait_for(ws.send_bytes(frame), self._send_timeout)
+        else:
+            await asyncio.wait_for(ws.send_text(frame), self._send_timeout)
+        self.send_latency.observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _replayed_already(replayed_to: dict[int, int], event: StreamEvent) -> bool:
+        """
+        Whether a replay that read up to ``replayed_to`` sent the event.
+        Forgets a partition once the live stream reaches its end offset.
+        """
+        end = replayed_to.get(event.partition)
+        if end is None or event.offset is None:
+            return False
+        if event.offset < end:
+            return True
+        del replayed_to[event.partition]
+        return False
+
+    def _skip_replayed(self, event: StreamEvent) -> set[WebSocket] | None:
+        """
+        Live sockets whose replay already sent the event.
+        """
+        skip = set()
+        for ws, replayed_to in list(self._replayed_to.items()):
+            if self._replayed_already(replayed_to, event):
+                skip.add(ws)
+            elif not replayed_to:
+                del self._replayed_to[ws]
+        return skip or None
+
+    def _hold_for_replay(self, events: list[StreamEvent]) -> None:
+        for ws, held in list(self.replaying.items()):
+            if len(held) + len(events) > self.max_replay_buffer:
+                # The replay is too far behind live; its owner closes it
+                del self.replaying[ws]
+                self._overflowed.add(ws)
+                continue
+            held.extend(events)
+
+    def stamp(self, events: list[StreamEvent]) -> list[StreamEvent]:
+        """
+        Give events without a seq the next numbers of the stream; events
+        stamped by the hub leader move the stream to their seq.
+        """
+        stamped = []
+        for event in events:
+            if event.seq is None:
+                self.seq += 1
+                event = event._replace(seq=self.seq)
+            else:
+                self.seq = event.seq
+            stamped.append(event)
+        return stamped
+
+    async def join_stream(self, stream_id: str, seq: int) -> None:
+        """
+        Continue the hub leader's stream from ``seq``, so sockets can resume
+        on any worker. If that is not where this manager's stream stands
+        (first batch, or batches missed while reconnecting), the resume
+        buffer is dropped and live sockets get a new ``hello``.
+        """
+        if stream_id == self.stream_id and seq == self.seq:
+            return
+        self.stream_id = stream_id
+        self.seq = seq
+        self._history.clear()
+        for ws in list(self.active):
+            await self.send_control(ws, {"type": "hello", "stream": stream_id, "seq": seq})
+
+    async def broadcast_raw_many(self, events: list[StreamEvent]):
+        """
+        Send consumed events, in order, still encoded as they came off
+        Kafka. Sockets using the same codec get a frame built around the raw
+        bytes; other codecs decode each event once and re-encode once.
+        Either way the work per event is independent of the number of
+        sockets.
+        """
+        events = self.stamp(events)
+        self._history.extend(events)
+
+        if self.replaying:
+            self._hold_for_replay(events)
+
+        print(f"📡 Broadcasting {len(events)} events to {len(self.active)} admin sockets")
+        for event in events:
+            if not self.active:
+                break
+            try:
+                decoded = recipients = None
+                if self.subscriptions.filtered:
+                    # Decoded once for matching and for other codecs' frames
+                    decoded = event.codec.decode(event.raw_event)
+                    recipients = self.subscriptions.recipients(event_filter_keys(decoded))
+                self._fan_out(
+                    self._raw_frames(event.topic, event.raw_event, event.codec, decoded, event.seq),
+                    recipients,
+                    self._skip_replayed(event) if self._replayed_to else None,
+                    event.timestamp,
+                )
+            except ValueError as e:
+                # Undecodable for another codec; don't fail the whole batch
+                print("⚠️ Skipping undecodable message:", repr(e))
+
+        # Let the writers drain before the next batch is enqueued
+        await asyncio.sleep(0)
+
+    def _raw_frames(
+        self,
+        topic: str,
+        raw_event: bytes,
+        codec: EventCodec,
+        event: dict | None = None,
+        seq: int | None = None,
+    ):
+        frames: dict[str, bytes | str] = {}
+        decoded = [] if event is None else [event]
+
+        def frame_for(target: EventCodec) -> bytes | str:
+            if target.name not in frames:
+                if target.name == codec.name:
+                    data = target.envelope(topic, raw_event, seq)
+                else:
+                    if not decoded:
+                        decoded.append(codec.decode(raw_event))
+                    envelope = {"topic": topic, "event": decoded[0]}
+                    data = target.encode(envelope if seq is None else {"seq": seq, **envelope})
+                frames[target.name] = self._as_frame(target, data)
+            return frames[target.name]
+
+        return frame_for
+
+    @staticmethod
+    def _as_frame(codec: EventCodec, data: bytes) -> bytes | str:
+        # Text codecs go out as text frames (browsers JSON.parse them)
+        return data if codec.binary else data.decode("utf-8")
+
+    def _fan_out(
+        self,
+        frame_for,
+        recipients: set[WebSocket] | None = None,
+        skip: set[WebSocket] | None = None,
+        timestamp: int | None = None,
+    ):
+        """
+        Enqueue one frame per live socket (or per matching subscriber),
+        except those in ``skip``; never waits on a client.
+        """
+        if not self.active:
+            print("⚠️ No active admin WS connections")
+            return
+
+        enqueued_at = time.perf_counter()
+        for ws in list(self.active if recipients is None else recipients):
+            queue = self.queues.get(ws)
+            if queue is None:
+                # Still replaying; held back separately
+                continue
+            if skip and ws in skip:
+                continue
+            try:
+                queue.put_nowait((frame_for(self.codec_for(ws)), enqueued_at, True, timestamp))
+            except asyncio.QueueFull:
+                self.evict(ws, "queue_full")
 
+    def stats(self) -> dict:
+        depths = [queue.qsize() for queue in self.queues.values()]
+        return {
+            "stream": self.stream_id,
+            "seq": self.seq,
+            "resume_buffered": len(self._history),
+            "active": len(self.active),
+            "replaying": len(self.replaying),
+            "send_queue_size": self.send_queue_size,
+            "queued_total": sum(depths),
+            "queued_max": max(depths, default=0),
+        }
 
 
-admin_ws_manager = AdminWebSocketManager()
+admin_ws_manager = AdminWebSocketManager(
+    max_replay_buffer=settings.admin_replay_max_buffered,
+    send_queue_size=settings.admin_ws_send_queue_size,
+    send_timeout_ms=settings.admin_ws_send_timeout_ms,
+    coalesce_ms=settings.admin_ws_coalesce_ms,
+    coalesce_max_events=settings.admin_ws_coalesce_max_events,
+    max_events_per_second=settings.admin_ws_max_events_per_second,
+    resume_buffer_size=settings.admin_ws_resume_buffer_size,
+)
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from aiokafka import AIOKafkaConsumer, TopicPartition
+from fastapi import WebSocket
+
+from app.core.codecs import EventCodec, JsonCodec, codec_from_headers
+from app.core.metrics import metrics
+from app.websockets.manager import AdminWebSocketManager, StreamEvent, admin_ws_manager
+
+
+def parse_since(value: str) -> datetime:
+    """
+    ``since`` query parameter: ISO 8601 (naive means UTC) or Unix seconds.
+    Raises ValueError.
+    """
+    try:
+        return datetime.fromtimestamp(float(value), tz=timezone.utc)
+    except ValueError:
+        pass
+    since = datetime.fromisoformat(value)
+    return since if since.tzinfo else since.replace(tzinfo=timezone.utc)
+
+
+class StreamReplayer:
+    """
+    Replays the activity topic from a timestamp to one admin socket, then
+    hands the socket over to the live stream.
+
+    The socket is registered with the manager in replay mode before the
+    replay starts, so live events are held back from that moment. A
+    dedicated group-less reader seeks every partition with
+    ``offsets_for_times(since)`` and reads up to the end offsets taken after
+    registration. Everything below those offsets is sent by the replay;
+    live events below them, held back or delivered after the socket went
+    live by a consumer that is still behind, are dropped as duplicates. The
+    rest are sent in order. No gaps, no duplicates.
+
+    Replay is paced to ``rate`` events/sec so one admin cannot starve the
+    live path.
+    """
+
+    def __init__(
+        self,
+        *,
+        bootstrap_servers: str,
+        topic: str,
+        rate: int,
+        enabled: bool = True,
+        codec: EventCodec | None = None,
+        manager: AdminWebSocketManager = admin_ws_manager,
+    ):
+        if enabled and rate <= 0:
+            raise ValueError("ADMIN_REPLAY_RATE must be > 0")
+
+        self._bootstrap_servers = bootstrap_servers
+        self._topic = topic
+        self._rate = rate
+        self._enabled = enabled
+        # Used for messages without a codec header
+        self._codec = codec or JsonCodec()
+        self._manager = manager
+
+        self._replayed = metrics.counter(
+            "activity_stream_replayed_total", "Historical events replayed to admin sockets"
+        )
+        self._active = metrics.gauge(
+            "activity_stream_replays_active", "Admin sockets currently replaying history"
+        )
+
+    async def replay(self, ws: WebSocket, since: datetime) -> None:
+        """
+        Run a replay for a socket connected with ``replay=True``. Closes the
+        socket (1013, try again later) if the replay cannot complete.
+        """
+        self._active.inc()
+        try:
+            replayed, replayed_to = 0, {}
+            if self._enabled:
+                replayed, replayed_to = await self._read(ws, since)
+
+            # Marks the end of history; held-back live events follow
+            await self._manager.send(
+                ws,
+                self._manager.message_frame(ws, {"type": "replay_complete", "replayed": replayed}),
+            )
+            await self._manager.go_live(ws, replayed_to)
+            print(f"⏩ Replayed {replayed} events since {since.isoformat()}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("❌ Activity replay failed:", repr(e))
+            await self._manager.abort(ws, "replay failed")
+        finally:
+            self._active.dec()
+
+    async def _read(self, ws: WebSocket, since: datetime) -> tuple[int, dict[int, int]]:
+        reader = AIOKafkaConsumer(
+            bootstrap_servers=self._bootstrap_servers,
+            group_id=None,
+            enable_auto_commit=False,
+        )
+        await reader.start()
+        try:
+            await reader.topics()  # load topic metadata
+            partitions = reader.partitions_for_topic(self._topic) or set()
+            tps = [TopicPartition(self._topic, p) for p in sorted(partitions)]
+            if not tps:
+                return 0, {}
+            reader.assign(tps)
+
+            # Live events from here on are held back by the manager
+            end = await reader.end_offsets(tps)
+            starts = await reader.offsets_for_times(
+                {tp: int(since.timestamp() * 1000) for tp in tps}
+            )
+            for tp in tps:
+                found = starts.get(tp)
+                reader.seek(tp, found.offset if found else end[tp])
+
+            replayed = await self._send_until(reader, ws, end)
+            return replayed, {tp.partition: offset for tp, offset in end.items()}
+        finally:
+            await reader.stop()
+
+    async def _send_until(
+        self,
+        reader: AIOKafkaConsumer,
+        ws: WebSocket,
+        end: dict[TopicPartition, int],
+    ) -> int:
+        remaining = {tp for tp in end if await reader.position(tp) < end[tp]}
+        sent = 0
+        started = time.monotonic()
+
+        while remaining:
+            self._manager.check_replay(ws)
+            batch = await reader.getmany(
+                *remaining,
+                timeout_ms=500,
+                max_records=max(1, min(self._rate, 500)),
+            )
+
+            for tp, records in batch.items():
+                for record in records:
+                    if record.offset >= end[tp]:
+                        break
+                    event = StreamEvent(
+                        record.topic,
+                        record.partition,
+                        record.offset,
+                        record.value,
+                        codec_from_headers(record.headers, self._codec),
+                    )
+                    try:
+                        if not self._manager.wants(ws, event):
+                            continue
+                        await self._manager.send(ws, self._manager.event_frame(ws, event))
+                    except ValueError as e:
+                        print("⚠️ Skipping undecodable message:", repr(e))
+                        continue
+                    sent += 1
+                    self._replayed.inc()
+
+            for tp in list(remaining):
+                # Position, not last record: compacted / aborted offsets
+                # leave holes
+                if await reader.position(tp) >= end[tp]:
+                    remaining.discard(tp)
+
+            # Pace to the configured rate
+            ahead = sent / self._rate - (time.monotonic() - started)
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+
+        return sent
+
+
+_stream_replayer: StreamReplayer | None = None
+
+
+def set_stream_replayer(replayer: StreamReplayer) -> None:
+    global _stream_replayer
+    _stream_replayer = replayer
+
+
+def get_stream_replayer_instance() -> StreamReplayer:
+    if _stream_replayer is None:
+        raise RuntimeError("Activity stream replayer is not initialized")
+    return _stream_replayer
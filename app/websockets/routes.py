@@ -1,6 +1,10 @@
+import asyncio
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from app.database.database import SessionLocal
+from app.core.codecs import negotiate_subprotocol
+from app.database.database import AsyncRoutedSessionLocal
 from app.websockets.manager import admin_ws_manager
+from app.websockets.replay import get_stream_replayer_instance, parse_since
 from app.api.deps import get_current_admin_from_ws
 
 router = APIRouter()
@@ -10,22 +14,70 @@ async def admin_activity_ws(
     websocket: WebSocket,
 ):
     print("🔥 WS endpoint hit")
-    await websocket.accept()
+    # Dashboards opt into a codec via Sec-WebSocket-Protocol,
+    # e.g. "activity.v1.msgpack"; JSON text frames otherwise
+    codec = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+    await websocket.accept(subprotocol=codec.subprotocol if codec else None)
     print("✅ WS accepted")
 
-    db = SessionLocal()
+    replay_task = None
 
     try:
-        admin = await get_current_admin_from_ws(websocket, db)
+        # The session (and its pooled connection) is only needed to
+        # authenticate, not for the life of the socket
+        async with AsyncRoutedSessionLocal() as db:
+            admin = await get_current_admin_from_ws(websocket, db)
         print("🧑 Admin authenticated:", admin.email)
-        await admin_ws_manager.connect(websocket)
+
+        # ?since=<ISO 8601 | Unix seconds>: replay history first, then live
+        since = websocket.query_params.get("since")
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError:
+                await websocket.close(code=1008, reason="invalid since")
+                raise WebSocketDisconnect()
+
+        # ?stream=<id>&last_seq=<n>: resume after a reconnect from memory
+        last_seq = websocket.query_params.get("last_seq")
+        if last_seq is not None:
+            try:
+                last_seq = int(last_seq)
+            except ValueError:
+                await websocket.close(code=1008, reason="invalid last_seq")
+                raise WebSocketDisconnect()
+
+        await admin_ws_manager.connect(
+            websocket, codec, replay=bool(since) or last_seq is not None
+        )
+        if last_seq is not None:
+            replay_task = asyncio.create_task(
+                admin_ws_manager.resume(websocket, websocket.query_params.get("stream"), last_seq)
+            )
+        elif since:
+            replay_task = asyncio.create_task(
+                get_stream_replayer_instance().replay(websocket, since)
+            )
         print(f"🟢 WS added | total={len(admin_ws_manager.active)}")
         while True:
-            await websocket.receive_text()  # keep alive
+            # Subscription filters / keep-alive
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = message.get("text")
+            await admin_ws_manager.handle_message(
+                websocket, data if data is not None else message.get("bytes", b"")
+            )
     except WebSocketDisconnect:
-        admin_ws_manager.disconnect(websocket)
         print("🔴 Admin WebSocket disconnected")
     except Exception as e:
-        print("❌ WS error:", e)
+        print("❌ Admin WebSocket failed:", repr(e))
+        try:
+            await websocket.close(code=1011, reason="internal error")
+        except Exception:
+            pass
     finally:
-        db.close()
+        if replay_task:
+            replay_task.cancel()
+        # Drops the registration, send queue and writer, however we got here
+        admin_ws_manager.disconnect(websocket)
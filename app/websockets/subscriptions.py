@@ -0,0 +1,115 @@
+from fastapi import WebSocket
+
+
+# Filter fields of a subscription; values within a field are OR-ed, fields
+# are AND-ed, an empty field matches everything
+FILTER_FIELDS = ("event_types", "actor_ids", "task_ids", "resource_types")
+
+
+def event_filter_keys(event: dict) -> dict[str, set]:
+    """
+    Values of a ``BaseEvent`` dict for each filter field.
+
+    A task event matches the task itself, its parent and its root, so
+    subscribing to a task also delivers its subtasks' events.
+    """
+    actor = event.get("actor") or {}
+    resource = event.get("resource") or {}
+
+    task_ids = set()
+    if resource.get("type") == "task":
+        task_ids = {
+            value
+            for value in (resource.get("id"), resource.get("parent_id"), resource.get("root_id"))
+            if value is not None
+        }
+
+    return {
+        "event_types": {event.get("event_type")},
+        "actor_ids": {actor.get("id")},
+        "task_ids": task_ids,
+        "resource_types": {resource.get("type")},
+    }
+
+
+class SubscriptionIndex:
+    """
+    Index from filter values to the sockets subscribed to them.
+
+    Sockets without filters are kept apart and always match. For filtered
+    sockets, each field yields the sockets indexed under the event's values
+    plus those that do not constrain that field; the recipients are the
+    intersection over all fields. Only sockets relevant to the event are
+    touched, not every connection.
+    """
+
+    def __init__(self):
+        self._unfiltered: set[WebSocket] = set()
+        self._filters: dict[WebSocket, dict[str, frozenset]] = {}
+        self._index: dict[str, dict] = {field: {} for field in FILTER_FIELDS}
+        # Filtered sockets that leave the field unconstrained
+        self._any: dict[str, set[WebSocket]] = {field: set() for field in FILTER_FIELDS}
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self._filters)
+
+    def is_filtered(self, ws: WebSocket) -> bool:
+        return ws in self._filters
+
+    def add(self, ws: WebSocket) -> None:
+        self._unfiltered.add(ws)
+
+    def remove(self, ws: WebSocket) -> None:
+        self._unfiltered.discard(ws)
+        filters = self._filters.pop(ws, None)
+        if filters is None:
+            return
+        for field, values in filters.items():
+            self._any[field].discard(ws)
+            index = self._index[field]
+            for value in values:
+                sockets = index.get(value)
+                if sockets is not None:
+                    sockets.discard(ws)
+                    if not sockets:
+                        del index[value]
+
+    def subscribe(self, ws: WebSocket, filters: dict[str, list]) -> None:
+        """
+        Replace the socket's filters. No values in any field means every
+        event.
+        """
+        self.remove(ws)
+        normalized = {field: frozenset(filters.get(field) or ()) for field in FILTER_FIELDS}
+        if not any(normalized.values()):
+            self._unfiltered.add(ws)
+            return
+
+        self._filters[ws] = normalized
+        for field, values in normalized.items():
+            if not values:
+                self._any[field].add(ws)
+            for value in values:
+                self._index[field].setdefault(value, set()).add(ws)
+
+    def recipients(self, keys: dict[str, set]) -> set[WebSocket]:
+        matched: set[WebSocket] | None = None
+        for field in FILTER_FIELDS:
+            index = self._index[field]
+            candidates = set(self._any[field])
+            for value in keys[field]:
+                candidates |= index.get(value, set())
+            matched = candidates if matched is None else matched & candidates
+            if not matched:
+                break
+        return self._unfiltered | (matched or set())
+
+    def matches(self, ws: WebSocket, keys: dict[str, set]) -> bool:
+        filters = self._filters.get(ws)
+        if filters is None:
+            return True
+        return all(
+            not values or values & keys[field]
+            for field, values in filters.items()
+        )
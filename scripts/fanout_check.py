@@ -0,0 +1,137 @@
+"""
+Local multi-worker check for ``ActivityStreamHub``.
+
+Starts several worker processes that each run a hub, the way
+``uvicorn --workers N`` does with ``ADMIN_STREAM_MODE=hub``. The elected
+leader injects events, every worker must receive all of them; then the
+leader is killed and the check verifies a follower takes over.
+
+    python -m scripts.fanout_check --workers 4 --events 1000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from app.core.codecs import JsonCodec
+
+
+class _RecordingManager:
+    """
+    Stands in for ``AdminWebSocketManager``: counts delivered events.
+    """
+
+    def __init__(self):
+        self.received = 0
+        self.stream_id = f"check-{os.getpid()}"
+        self.seq = 0
+
+    async def join_stream(self, stream_id, seq):
+        self.stream_id = stream_id
+        self.seq = seq
+
+    async def broadcast_raw_many(self, events):
+        self.received += len(events)
+
+
+def _worker(socket_path: str, lock_path: str, events: int, results, phase_ready):
+    from app.kafka.consumer import KafkaConsumerService
+    from app.websockets.fanout import ActivityStreamHub
+    from app.websockets.manager import StreamEvent
+
+    async def main():
+        manager = _RecordingManager()
+        hub = ActivityStreamHub(
+            consumer=KafkaConsumerService(
+                bootstrap_servers="unused:9092", topic="unused", group_id="unused", enabled=False
+            ),
+            socket_path=socket_path,
+            lock_path=lock_path,
+            max_buffer_bytes=64 * 1024 * 1024,
+            manager=manager,
+        )
+        runner = asyncio.create_task(hub.run())
+
+        while True:
+            await asyncio.sleep(0.05)
+            if hub.is_leader and hub.follower_count >= phase_ready.value:
+                codec = JsonCodec()
+                for seq in range(events):
+                    batch = [StreamEvent("user.activity", 0, seq, codec.encode({"seq": seq}), codec)]
+                    hub.forward(batch)
+                    # The leader's own admins get the batch locally
+                    await manager.broadcast_raw_many(batch)
+                    if seq % 100 == 0:
+                        await asyncio.sleep(0)
+                results.put(("leader", os.getpid(), manager.received))
+                await asyncio.sleep(0.5)
+                await hub.stop()
+                runner.cancel()
+                os._exit(0)  # simulate the leader dying; followers fail over
+
+            if not hub.is_leader and manager.received >= events:
+                results.put(("follower", os.getpid(), manager.received))
+                manager.received = 0
+
+    asyncio.run(main())
+
+
+def run_check(workers: int, events: int, timeout: float = 30.0) -> bool:
+    tmp = tempfile.mkdtemp(prefix="activity-stream-")
+    socket_path = os.path.join(tmp, "stream.sock")
+    lock_path = os.path.join(tmp, "stream.lock")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    # Followers the leader waits for before injecting
+    phase_ready = ctx.Value("i", workers - 1)
+    procs = [
+        ctx.Process(target=_worker, args=(socket_path, lock_path, events, results, phase_ready))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    ok = True
+    try:
+        for phase, alive in enumerate(range(workers, 1, -1), start=1):
+            phase_ready.value = alive - 1
+            reports = []
+            deadline = time.monotonic() + timeout
+            while len(reports) < alive and time.monotonic() < deadline:
+                try:
+                    reports.append(results.get(timeout=0.5))
+                except Exception:
+                    pass
+
+            leaders = [r for r in reports if r[0] == "leader"]
+            complete = [r for r in reports if r[2] >= events]
+            passed = len(leaders) == 1 and len(complete) == alive
+            ok = ok and passed
+            print(
+                f"{'✅' if passed else '❌'} phase {phase}: {alive} workers, "
+                f"leader pid={leaders[0][1] if leaders else '-'}, "
+                f"{len(complete)}/{alive} received all {events} events"
+            )
+            if not passed:
+                break
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.join()
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--events", type=int, default=1000)
+    args = parser.parse_args()
+    raise SystemExit(0 if run_check(args.workers, args.events) else 1)
+
+
+if __name__ == "__main__":
+    main()